@@ -1,45 +1,314 @@
+import argparse
+import asyncio
+import logging
 import os
 
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
 
-from core.agents import create_graph
+from core.agents import (
+    BatchRunner,
+    ResearchComplete,
+    ResearchState,
+    create_initial_state,
+    refresh,
+    research,
+    run_worker_pool,
+)
+from core.agents.batch import DEFAULT_PATH as DEFAULT_BATCH_PATH
+from core.agents.nodes import DEFAULT_SUBTOPIC_MAX_ITERATIONS
 from core.exceptions import APIKeyException
+from core.services import SQLiteJobQueue, get_hedger
+from core.services.job_queue import DEFAULT_PATH as DEFAULT_QUEUE_PATH
+from core.utils import NodeProfiler
 
 
-def main():
-    load_dotenv()
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the deep research agent.")
+    parser.add_argument(
+        "--decompose",
+        action="store_true",
+        help="Split broad briefs into subtopics that are researched in parallel",
+    )
+    parser.add_argument(
+        "--subtopic-iterations",
+        type=int,
+        default=DEFAULT_SUBTOPIC_MAX_ITERATIONS,
+        help="Maximum search iterations per subtopic in decompose mode",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Wall-clock seconds the run may take, including the report",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Maximum LLM tokens (prompt and completion) for the run",
+    )
+    parser.add_argument(
+        "--search-budget",
+        type=int,
+        help="Maximum number of web search calls for the run",
+    )
+    parser.add_argument(
+        "--report-mode",
+        choices=["single", "sections"],
+        default="single",
+        help="Write the report in one completion, or outline it and write its "
+        "sections in parallel",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Start searching the raw topic while the clarifying questions are "
+        "being answered",
+    )
+    parser.add_argument(
+        "--refresh",
+        metavar="REPORT",
+        help="Update an earlier report (its .pdf, .md or .json file) with sources "
+        "published since it was written, instead of starting a new topic",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Research every topic in FILE (one per line) through the OpenAI "
+        "Batch API, at half the LLM cost but hours rather than minutes",
+    )
+    parser.add_argument(
+        "--resume-batch",
+        action="store_true",
+        help="Resume the batch mode runs that an earlier process left unfinished",
+    )
+    parser.add_argument(
+        "--batch-db",
+        default=os.getenv("BATCH_DB_PATH", DEFAULT_BATCH_PATH),
+        metavar="PATH",
+        help="SQLite database holding the checkpoints and pending batches of "
+        "batch mode runs",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between batch status checks in batch mode",
+    )
+    parser.add_argument(
+        "--enqueue",
+        metavar="FILE",
+        help="Add every topic in FILE (one per line) to the job queue for the "
+        "workers to research, then exit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Run N worker processes that research the jobs in the job queue",
+    )
+    parser.add_argument(
+        "--jobs-per-worker",
+        type=int,
+        default=4,
+        help="Jobs each worker process runs concurrently",
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Stop the workers once the job queue is empty instead of waiting "
+        "for new jobs",
+    )
+    parser.add_argument(
+        "--queue",
+        default=os.getenv("JOB_QUEUE_PATH", DEFAULT_QUEUE_PATH),
+        metavar="PATH",
+        help="SQLite job queue used by --enqueue and --workers",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        default=os.getenv("CHECKPOINTS_URL") or None,
+        metavar="URL",
+        help="SQLite path or Postgres connection string the workers checkpoint "
+        "runs to (default: checkpoints.db next to the queue)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Write per-node CPU flame graphs and memory statistics to DIR",
+    )
+    return parser.parse_args()
 
-    if not os.getenv("OPENAI_API_KEY"):
-        raise APIKeyException("OPENAI_API_KEY not found in environment variables")
-    if not os.getenv("EXA_API_KEY"):
-        raise APIKeyException("EXA_API_KEY not found in environment variables")
 
-    topic = input("Enter your research topic: ")
+async def ask_in_terminal(questions: list[str]) -> list[str]:
+    questions_text = "\n".join(f"{i + 1}. {q}" for i, q in enumerate(questions))
+    print(
+        "\nTo better understand your research needs, I have a few questions:"
+        f"\n\n{questions_text}\n"
+    )
 
-    graph = create_graph()
+    answers = []
+    for i in range(len(questions)):
+        answer = await asyncio.to_thread(input, f"Answer {i + 1}: ")
+        answers.append(answer.strip())
+    return answers
 
-    initial_state = {
-        "messages": [HumanMessage(content=topic)],
-        "research_brief": None,
-        "search_queries": [],
-        "search_results": [],
-        "compressed_findings": None,
-        "knowledge_gaps": [],
-        "search_iteration": 0,
-        "needs_more_context": True,
-    }
 
-    print("Starting deep research...")
+async def run(args: argparse.Namespace) -> None:
+    node_wrapper = None
+    if args.profile:
+        node_wrapper = NodeProfiler(args.profile, state_schema=ResearchState).wrap
 
-    final_state = graph.invoke(initial_state)
+    if args.refresh:
+        print(f"Refreshing {args.refresh}...")
+        events = refresh(
+            args.refresh,
+            deadline=args.deadline,
+            token_budget=args.token_budget,
+            search_budget=args.search_budget,
+            node_wrapper=node_wrapper,
+        )
+    else:
+        topic = input("Enter your research topic: ")
+        print("Starting deep research...")
+        events = research(
+            topic,
+            answers=ask_in_terminal,
+            decompose=args.decompose,
+            subtopic_iterations=args.subtopic_iterations,
+            deadline=args.deadline,
+            token_budget=args.token_budget,
+            search_budget=args.search_budget,
+            report_mode=args.report_mode,
+            prefetch=args.prefetch,
+            node_wrapper=node_wrapper,
+        )
 
-    for message in final_state["messages"]:
-        if message.type == "assistant":
-            print(message.content)
+    result = None
+    async for event in events:
+        if isinstance(event, ResearchComplete):
+            result = event
+
+    prompt_tokens = sum(call["prompt_tokens"] for call in result.llm_usage)
+    cached_tokens = sum(call["cached_tokens"] for call in result.llm_usage)
+    print(
+        f"LLM calls: {len(result.llm_usage)}, prompt tokens: {prompt_tokens} "
+        f"({cached_tokens} cached)"
+    )
+    web_calls = sum(search["web_calls"] for search in result.search_usage)
+    web_results = sum(
+        search["num_results"] for search in result.search_usage if search["web_calls"]
+    )
+    print(
+        f"Web searches: {web_calls} ({web_results} results), "
+        f"sources: {len(result.sources)}"
+    )
+    hedger = get_hedger()
+    if hedger and hedger.stats()["hedges"]:
+        stats = hedger.stats()
+        print(
+            f"Hedged requests: {stats['hedges']} of {stats['requests']} "
+            f"({stats['hedge_wins']} answered first)"
+        )
 
     print("Deep research complete")
 
 
+async def run_batch(args: argparse.Namespace) -> None:
+    node_wrapper = None
+    if args.profile:
+        node_wrapper = NodeProfiler(args.profile, state_schema=ResearchState).wrap
+
+    runner = BatchRunner(
+        poll_interval=args.poll_interval,
+        node_wrapper=node_wrapper,
+        path=args.batch_db,
+    )
+
+    if args.resume_batch:
+        print("Resuming unfinished batch mode runs...")
+        results = await runner.resume()
+    else:
+        with open(args.batch) as f:
+            topics = [line.strip() for line in f if line.strip()]
+
+        print(f"Starting deep research on {len(topics)} topics in batch mode...")
+
+        states = [
+            create_initial_state(
+                topic,
+                answers=[],
+                decompose=args.decompose,
+                subtopic_iterations=args.subtopic_iterations,
+                token_budget=args.token_budget,
+                search_budget=args.search_budget,
+            )
+            for topic in topics
+        ]
+        results = await runner.run(states)
+
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Failed: {str(result)}")
+        else:
+            topic = result["messages"][0].content
+            print(f"Done: {topic} ({len(result['llm_usage'])} LLM calls)")
+
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"Batch research complete, {len(results) - failed} of {len(results)} done")
+
+
+def enqueue(args: argparse.Namespace) -> None:
+    with open(args.enqueue) as f:
+        topics = [line.strip() for line in f if line.strip()]
+
+    queue = SQLiteJobQueue(args.queue)
+    for topic in topics:
+        queue.enqueue(
+            {
+                "topic": topic,
+                "decompose": args.decompose,
+                "subtopic_iterations": args.subtopic_iterations,
+                "deadline": args.deadline,
+                "token_budget": args.token_budget,
+                "search_budget": args.search_budget,
+                "report_mode": args.report_mode,
+            }
+        )
+
+    counts = ", ".join(f"{count} {status}" for status, count in queue.counts().items())
+    print(f"Queued {len(topics)} topics in {args.queue} ({counts})")
+    queue.close()
+
+
+def main():
+    load_dotenv()
+    args = parse_args()
+
+    # The agent reports its progress through logging
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("core").setLevel(logging.INFO)
+
+    if args.enqueue:
+        enqueue(args)
+        return
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise APIKeyException("OPENAI_API_KEY not found in environment variables")
+    if not os.getenv("EXA_API_KEY"):
+        raise APIKeyException("EXA_API_KEY not found in environment variables")
+
+    if args.workers:
+        run_worker_pool(
+            args.workers,
+            queue_path=args.queue,
+            concurrency=args.jobs_per_worker,
+            drain=args.drain,
+            checkpoints=args.checkpoints,
+        )
+        return
+
+    batch = args.batch or args.resume_batch
+    asyncio.run(run_batch(args) if batch else run(args))
+
+
 if __name__ == "__main__":
     main()
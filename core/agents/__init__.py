@@ -1,27 +1,57 @@
 """Agent modules for the deep research agent."""
 
-from .graph import create_graph
+from .batch import BatchRunner
+from .events import (
+    BriefReady,
+    FindingsUpdated,
+    QueriesGenerated,
+    ReportChunk,
+    ResearchComplete,
+    ResearchEvent,
+    SourcesAdded,
+)
+from .graph import create_graph, create_refresh_graph, create_research_subgraph
 from .nodes import (
     clarify_node,
     compression_node,
     generate_queries_node,
     generate_report_node,
+    merge_subtopics_node,
     reflection_node,
     research_brief_node,
     save_pdf_node,
     search_node,
 )
+from .research import create_initial_state, create_refresh_state, refresh, research
 from .state import ResearchState
+from .worker import Worker, run_worker_pool
 
 __all__ = [
+    "research",
+    "create_initial_state",
+    "refresh",
+    "create_refresh_state",
+    "BatchRunner",
+    "Worker",
+    "run_worker_pool",
+    "ResearchEvent",
+    "BriefReady",
+    "QueriesGenerated",
+    "SourcesAdded",
+    "FindingsUpdated",
+    "ReportChunk",
+    "ResearchComplete",
     "ResearchState",
     "create_graph",
+    "create_research_subgraph",
+    "create_refresh_graph",
     "clarify_node",
     "research_brief_node",
     "generate_queries_node",
     "search_node",
     "compression_node",
     "reflection_node",
+    "merge_subtopics_node",
     "generate_report_node",
     "save_pdf_node",
 ]
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Command
+
+from ..exceptions import LLMServiceException
+from ..services import OpenAIBatchClient
+from ..services.openai_batch import POLL_INTERVAL
+from .graph import NodeWrapper, create_graph
+from .state import ResearchState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = ".batches/batches.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_runs (
+    thread_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batch_submissions (
+    batch_id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    custom_ids TEXT NOT NULL
+);
+"""
+
+
+class BatchRunner:
+    """Runs research jobs in deferred mode, with their LLM calls batched.
+
+    Every run starts and proceeds until each of its branches is waiting on a
+    completion. The waiting calls of all runs are grouped by stage (the call's
+    label, e.g. all compression calls) and each group is submitted as one
+    Batch API job. Once the jobs finish, every run is resumed from its
+    checkpoint with its responses, and the cycle repeats until all runs are
+    done. Reports are written in single mode, and prefetch is turned off,
+    because both rely on concurrent calls within a node. Nobody is there to
+    answer the clarifying questions, so they are skipped unless the initial
+    state holds the answers.
+
+    Checkpoints, the runs and the IDs of submitted batches are kept in the
+    SQLite database at `path`, so if the process dies while batches are
+    pending, `resume()` picks the runs up from their checkpoints and waits
+    for the batches already submitted instead of submitting them again.
+    """
+
+    def __init__(
+        self,
+        batch_client: OpenAIBatchClient | None = None,
+        poll_interval: float = POLL_INTERVAL,
+        node_wrapper: NodeWrapper | None = None,
+        path: str = DEFAULT_PATH,
+    ):
+        self.batch_client = batch_client or OpenAIBatchClient()
+        self.poll_interval = poll_interval
+        self.node_wrapper = node_wrapper
+        self.path = path
+
+    async def run(self, states: list[ResearchState]) -> list[ResearchState | Exception]:
+        """Runs each initial state to completion and returns the final states, or
+        the exception a run failed with, in the same order."""
+        job_id = uuid.uuid4().hex
+        thread_ids = [uuid.uuid4().hex for _ in states]
+
+        async with self._open() as (graph, conn):
+            await conn.executemany(
+                "INSERT INTO batch_runs (thread_id, job_id, position) VALUES (?, ?, ?)",
+                [(thread_id, job_id, i) for i, thread_id in enumerate(thread_ids)],
+            )
+            await conn.commit()
+
+            results = await asyncio.gather(
+                *(
+                    graph.ainvoke(
+                        {
+                            **state,
+                            "clarification_answers": state.get("clarification_answers")
+                            or [],
+                            "deferred": True,
+                            "report_mode": "single",
+                            "prefetch": False,
+                        },
+                        _config(thread_id),
+                    )
+                    for state, thread_id in zip(states, thread_ids, strict=True)
+                ),
+                return_exceptions=True,
+            )
+            return await self._drive(graph, conn, thread_ids, results)
+
+    async def resume(self) -> list[ResearchState | Exception]:
+        """Resumes the runs of earlier `run()` calls that did not finish, e.g.
+        because the process died, and returns their final states, or the
+        exception a run failed with, in the order they were started."""
+        async with self._open() as (graph, conn):
+            async with conn.execute(
+                "SELECT thread_id FROM batch_runs ORDER BY rowid"
+            ) as cursor:
+                thread_ids = [row[0] for row in await cursor.fetchall()]
+
+            if thread_ids:
+                logger.info("Resuming %d batch runs", len(thread_ids))
+            results = await asyncio.gather(
+                *(self._restore(graph, thread_id) for thread_id in thread_ids),
+                return_exceptions=True,
+            )
+            return await self._drive(graph, conn, thread_ids, results)
+
+    @asynccontextmanager
+    async def _open(
+        self,
+    ) -> AsyncIterator[tuple[CompiledStateGraph, aiosqlite.Connection]]:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        async with aiosqlite.connect(self.path) as conn:
+            await conn.executescript(_SCHEMA)
+            await conn.commit()
+            graph = create_graph(
+                node_wrapper=self.node_wrapper, checkpointer=AsyncSqliteSaver(conn)
+            )
+            yield graph, conn
+
+    async def _restore(
+        self, graph: CompiledStateGraph, thread_id: str
+    ) -> ResearchState:
+        config = _config(thread_id)
+        snapshot = await graph.aget_state(config)
+
+        if snapshot.interrupts:
+            return {**snapshot.values, "__interrupt__": list(snapshot.interrupts)}
+        # The process died while the run was between batches, or it had failed
+        if snapshot.next:
+            return await graph.ainvoke(None, config)
+        return snapshot.values
+
+    async def _drive(
+        self,
+        graph: CompiledStateGraph,
+        conn: aiosqlite.Connection,
+        thread_ids: list[str],
+        results: list[ResearchState | Exception],
+    ) -> list[ResearchState | Exception]:
+        step = 1
+        while True:
+            waiting = {
+                i: result["__interrupt__"]
+                for i, result in enumerate(results)
+                if isinstance(result, dict) and result.get("__interrupt__")
+            }
+            if not waiting:
+                break
+
+            # Interrupt IDs are only unique within a run
+            requests = defaultdict(dict)
+            for i, interrupts in waiting.items():
+                for pending in interrupts:
+                    label = pending.value["label"]
+                    custom_id = f"{thread_ids[i]}:{pending.id}"
+                    requests[label][custom_id] = pending.value["body"]
+
+            logger.info(
+                "Batch step %d: %d requests from %d runs (%s)",
+                step,
+                sum(map(len, requests.values())),
+                len(waiting),
+                ", ".join(sorted(requests)),
+            )
+            responses, batch_ids = await self._collect(conn, requests)
+
+            resumed = await asyncio.gather(
+                *(
+                    self._resume(
+                        graph,
+                        _config(thread_ids[i]),
+                        {
+                            pending.id: responses.get(
+                                f"{thread_ids[i]}:{pending.id}",
+                                {"error": "missing from the batch output"},
+                            )
+                            for pending in interrupts
+                        },
+                    )
+                    for i, interrupts in waiting.items()
+                ),
+                return_exceptions=True,
+            )
+            for i, result in zip(waiting, resumed, strict=True):
+                results[i] = result
+
+            await conn.executemany(
+                "DELETE FROM batch_submissions WHERE batch_id = ?",
+                [(batch_id,) for batch_id in batch_ids],
+            )
+            await conn.commit()
+            step += 1
+
+        for thread_id in thread_ids:
+            await graph.checkpointer.adelete_thread(thread_id)
+        await conn.executemany(
+            "DELETE FROM batch_runs WHERE thread_id = ?",
+            [(thread_id,) for thread_id in thread_ids],
+        )
+        await conn.commit()
+
+        return results
+
+    async def _collect(
+        self, conn: aiosqlite.Connection, requests: dict[str, dict[str, dict]]
+    ) -> tuple[dict[str, dict], list[str]]:
+        """Returns the responses to `requests`, grouped by label, and the IDs of
+        the batches they came from."""
+        custom_ids = {custom_id for stage in requests.values() for custom_id in stage}
+
+        # Batches submitted before a restart are waited on, not submitted again
+        async with conn.execute(
+            "SELECT batch_id, label, custom_ids FROM batch_submissions"
+        ) as cursor:
+            submitted = await cursor.fetchall()
+
+        waits = []
+        covered = set()
+        for batch_id, label, batch_custom_ids in submitted:
+            batch_custom_ids = json.loads(batch_custom_ids)
+            if custom_ids.isdisjoint(batch_custom_ids):
+                # Its runs were resumed from it before the restart
+                await conn.execute(
+                    "DELETE FROM batch_submissions WHERE batch_id = ?", (batch_id,)
+                )
+                continue
+            logger.info("Waiting for %s batch %s submitted earlier", label, batch_id)
+            waits.append(self._wait(label, batch_id, batch_custom_ids))
+            covered.update(batch_custom_ids)
+        await conn.commit()
+
+        for label, stage in requests.items():
+            remaining = {
+                custom_id: body
+                for custom_id, body in stage.items()
+                if custom_id not in covered
+            }
+            if remaining:
+                waits.append(self._run_batch(conn, label, remaining))
+
+        responses = {}
+        batch_ids = []
+        for batch_id, batch_responses in await asyncio.gather(*waits):
+            responses.update(batch_responses)
+            if batch_id:
+                batch_ids.append(batch_id)
+        return responses, batch_ids
+
+    async def _resume(
+        self, graph: CompiledStateGraph, config: dict, responses: dict
+    ) -> ResearchState:
+        return await graph.ainvoke(Command(resume=responses), config)
+
+    async def _run_batch(
+        self, conn: aiosqlite.Connection, label: str, requests: dict[str, dict]
+    ) -> tuple[str | None, dict]:
+        # A failed batch fails the runs waiting on it, not the whole job
+        try:
+            batch_id = await self.batch_client.submit(
+                requests, metadata={"stage": label}
+            )
+        except LLMServiceException as e:
+            logger.warning("Batch for %s failed: %s", label, e)
+            return None, {custom_id: {"error": str(e)} for custom_id in requests}
+
+        await conn.execute(
+            "INSERT INTO batch_submissions (batch_id, label, custom_ids) "
+            "VALUES (?, ?, ?)",
+            (batch_id, label, json.dumps(list(requests))),
+        )
+        await conn.commit()
+
+        return await self._wait(label, batch_id, list(requests))
+
+    async def _wait(
+        self, label: str, batch_id: str, custom_ids: list[str]
+    ) -> tuple[str, dict]:
+        try:
+            return batch_id, await self.batch_client.wait(batch_id, self.poll_interval)
+        except LLMServiceException as e:
+            logger.warning("Batch for %s failed: %s", label, e)
+            return batch_id, {custom_id: {"error": str(e)} for custom_id in custom_ids}
+
+
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
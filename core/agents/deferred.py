@@ -0,0 +1,88 @@
+import time
+from collections.abc import AsyncIterator
+
+from langgraph.types import interrupt
+from openai.types.chat import ChatCompletion
+
+from ..exceptions import LLMServiceException
+from ..services import OpenAIClient
+from ..services.openai_client import T
+
+
+class DeferredOpenAIClient(OpenAIClient):
+    """OpenAIClient for deferred runs, whose completions come from the Batch API.
+
+    Each call interrupts the graph with its request body, and `BatchRunner`
+    resumes the run with the response once the batch holding it has finished.
+    When the node runs again on resume, the call returns that response instead
+    of interrupting. Streams yield the whole completion as one chunk.
+    """
+
+    async def acall(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.5,
+        response_format: type[T] | None = None,
+        model: str | None = None,
+        label: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> str | T:
+        kwargs = self._completion_kwargs(
+            system_prompt,
+            user_prompt,
+            temperature,
+            response_format is not None,
+            model,
+            prompt_cache_key,
+        )
+        completion = self._defer(kwargs, label)
+
+        try:
+            return self._parse(completion, response_format, label, time.perf_counter())
+        except Exception as e:
+            raise LLMServiceException(f"OpenAI API call failed: {str(e)}") from e
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.5,
+        json_output: bool = False,
+        model: str | None = None,
+        label: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> AsyncIterator[str]:
+        kwargs = self._completion_kwargs(
+            system_prompt,
+            user_prompt,
+            temperature,
+            json_output,
+            model,
+            prompt_cache_key,
+        )
+        completion = self._defer(kwargs, label)
+
+        try:
+            content = self._parse(completion, None, label, time.perf_counter())
+        except Exception as e:
+            raise LLMServiceException(f"OpenAI API stream failed: {str(e)}") from e
+
+        if content:
+            yield content
+
+    def _defer(self, kwargs: dict, label: str | None) -> ChatCompletion:
+        response = interrupt({"label": label or "llm", "body": kwargs})
+
+        if "error" in response:
+            raise LLMServiceException(
+                f"OpenAI batch request failed: {response['error']}"
+            )
+        try:
+            return ChatCompletion.model_validate(response["body"])
+        except Exception as e:
+            raise LLMServiceException(f"Invalid OpenAI batch response: {str(e)}") from e
+
+    def _record_usage(self, completion, label: str | None, started: float) -> None:
+        super()._record_usage(completion, label, started)
+        self.usage[-1]["batch"] = True
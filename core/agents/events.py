@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ResearchEvent:
+    """Base class of the progress events yielded by `research()`."""
+
+
+@dataclass
+class BriefReady(ResearchEvent):
+    brief: str
+    subtopics: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class QueriesGenerated(ResearchEvent):
+    queries: list[str]
+    iteration: int
+    subtopic: str | None = None
+
+
+@dataclass
+class SourcesAdded(ResearchEvent):
+    """New sources, numbered with the `[S#]` IDs the report cites."""
+
+    sources: list[dict]
+
+
+@dataclass
+class FindingsUpdated(ResearchEvent):
+    findings: str
+    iteration: int
+
+
+@dataclass
+class ReportChunk(ResearchEvent):
+    """A piece of the report draft as it is generated, before citations are
+    expanded into links."""
+
+    text: str
+
+
+@dataclass
+class ResearchComplete(ResearchEvent):
+    report: str
+    sources: list[dict]
+    llm_usage: list[dict]
+    search_usage: list[dict]
@@ -1,49 +1,143 @@
+from collections.abc import Callable
+from functools import cache
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
 
 from .nodes import (
+    DEFAULT_MAX_ITERATIONS,
+    DEFAULT_MIN_ITERATIONS,
+    DEFAULT_SUBTOPIC_MAX_ITERATIONS,
     clarify_node,
     compression_node,
     generate_queries_node,
     generate_report_node,
     mcp_tool_node,
+    merge_subtopics_node,
     reflection_node,
+    refresh_findings_node,
+    refresh_queries_node,
+    refresh_report_node,
     research_brief_node,
     save_pdf_node,
     search_node,
 )
-from .state import ResearchState
+from .planner import can_iterate, plan_search, remaining_searches, split_budget
+from .state import ResearchState, source_key
+
+NodeWrapper = Callable[[str, Callable], Callable]
 
 
 def should_continue_searching(state: ResearchState) -> str:
     search_iteration = state.get("search_iteration", 0)
     needs_more_context = state.get("needs_more_context", False)
+    min_iterations = state.get("min_iterations", DEFAULT_MIN_ITERATIONS)
+    max_iterations = state.get("max_iterations", DEFAULT_MAX_ITERATIONS)
+
+    # The deadline and budgets take precedence over the minimum iterations
+    if not can_iterate(state):
+        return "generate_report"
 
-    # Minimum 3 iterations
-    if search_iteration < 3:
+    if search_iteration < min_iterations:
         return "generate_queries"
 
-    if needs_more_context and search_iteration < 5:
+    if needs_more_context and search_iteration < max_iterations:
         return "generate_queries"
 
     return "generate_report"
 
 
-def create_graph() -> StateGraph:
-    workflow = StateGraph(ResearchState)
+def route_after_brief(state: ResearchState) -> str | list[Send]:
+    # Nothing fits the deadline or budgets, report on what is already known
+    num_queries, _ = plan_search(state)
+    if not num_queries:
+        return "generate_report"
 
-    workflow.add_node("clarify", clarify_node)
-    workflow.add_node("research_brief", research_brief_node)
-    workflow.add_node("generate_queries", generate_queries_node)
-    workflow.add_node("search", search_node)
-    workflow.add_node("mcp_tools", mcp_tool_node)
-    workflow.add_node("compress", compression_node)
-    workflow.add_node("reflect", reflection_node)
-    workflow.add_node("generate_report", generate_report_node)
-    workflow.add_node("save_pdf", save_pdf_node)
+    subtopics = state.get("subtopics") or []
+    if not subtopics:
+        return "generate_queries"
+
+    # Each subtopic needs at least one search of its own
+    if remaining_searches(state) < len(subtopics):
+        subtopics = subtopics[: int(remaining_searches(state))]
+
+    max_iterations = state.get(
+        "subtopic_max_iterations", DEFAULT_SUBTOPIC_MAX_ITERATIONS
+    )
+    budget = split_budget(state, len(subtopics))
+
+    # Each subtopic gets its own research loop with its own iteration budget
+    return [
+        Send(
+            "research_subtopic",
+            {
+                "research_brief": subtopic["brief"],
+                "subtopic": subtopic["name"],
+                "search_queries": [],
+                "search_results": [],
+                "compressed_findings": None,
+                "knowledge_gaps": [],
+                "search_iteration": 0,
+                "needs_more_context": True,
+                "llm_usage": [],
+                "min_iterations": 1,
+                "max_iterations": max_iterations,
+                "search_usage": [],
+                "deferred": state.get("deferred", False),
+                **budget,
+            },
+        )
+        for subtopic in subtopics
+    ]
+
+
+def _research_subtopic_node(node_wrapper: NodeWrapper | None) -> Callable:
+    async def research_subtopic_node(state: ResearchState) -> ResearchState:
+        final_state = await create_research_subgraph(node_wrapper).ainvoke(state)
+
+        search_results = final_state["search_results"]
+
+        return {
+            "search_results": search_results,
+            "subtopic_findings": [
+                {
+                    "subtopic": state["subtopic"],
+                    "findings": final_state.get("compressed_findings"),
+                    "search_iteration": final_state.get("search_iteration", 0),
+                    "sources": {
+                        result["source_id"]: source_key(result)
+                        for result in search_results
+                    },
+                }
+            ],
+            "llm_usage": final_state.get("llm_usage", []),
+            "search_usage": final_state.get("search_usage", []),
+        }
+
+    return research_subtopic_node
+
+
+def _add_node(
+    workflow: StateGraph,
+    name: str,
+    node: Callable,
+    node_wrapper: NodeWrapper | None,
+) -> None:
+    workflow.add_node(name, node_wrapper(name, node) if node_wrapper else node)
+
+
+def _add_research_loop(
+    workflow: StateGraph,
+    done: str,
+    node_wrapper: NodeWrapper | None,
+) -> None:
+    _add_node(workflow, "generate_queries", generate_queries_node, node_wrapper)
+    _add_node(workflow, "search", search_node, node_wrapper)
+    _add_node(workflow, "mcp_tools", mcp_tool_node, node_wrapper)
+    _add_node(workflow, "compress", compression_node, node_wrapper)
+    _add_node(workflow, "reflect", reflection_node, node_wrapper)
 
-    workflow.add_edge(START, "clarify")
-    workflow.add_edge("clarify", "research_brief")
-    workflow.add_edge("research_brief", "generate_queries")
     workflow.add_edge("generate_queries", "search")
     workflow.add_edge("generate_queries", "mcp_tools")
     workflow.add_edge("search", "compress")
@@ -55,11 +149,86 @@ def create_graph() -> StateGraph:
         should_continue_searching,
         {
             "generate_queries": "generate_queries",
-            "generate_report": "generate_report",
+            "generate_report": done,
         },
     )
 
+
+@cache
+def create_research_subgraph(node_wrapper: NodeWrapper | None = None) -> StateGraph:
+    workflow = StateGraph(ResearchState)
+
+    _add_research_loop(workflow, END, node_wrapper)
+    workflow.add_edge(START, "generate_queries")
+
+    return workflow.compile()
+
+
+def create_graph(
+    node_wrapper: NodeWrapper | None = None,
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> StateGraph:
+    """Builds the research graph.
+
+    `node_wrapper`, if given, is called with each node's name and function and
+    returns the function to register, e.g. to profile or time every node.
+    `checkpointer` persists the state of each run (thread) so that interrupted
+    runs can be resumed; subtopic subgraphs share it.
+    """
+    workflow = StateGraph(ResearchState)
+
+    _add_node(workflow, "clarify", clarify_node, node_wrapper)
+    _add_node(workflow, "research_brief", research_brief_node, node_wrapper)
+    _add_node(
+        workflow,
+        "research_subtopic",
+        _research_subtopic_node(node_wrapper),
+        node_wrapper,
+    )
+    _add_node(workflow, "merge_subtopics", merge_subtopics_node, node_wrapper)
+    _add_node(workflow, "generate_report", generate_report_node, node_wrapper)
+    _add_node(workflow, "save_pdf", save_pdf_node, node_wrapper)
+    _add_research_loop(workflow, "generate_report", node_wrapper)
+
+    workflow.add_edge(START, "clarify")
+    workflow.add_edge("clarify", "research_brief")
+    workflow.add_conditional_edges(
+        "research_brief",
+        route_after_brief,
+        ["generate_queries", "research_subtopic", "generate_report"],
+    )
+    workflow.add_edge("research_subtopic", "merge_subtopics")
+    workflow.add_edge("merge_subtopics", "generate_report")
+
     workflow.add_edge("generate_report", "save_pdf")
     workflow.add_edge("save_pdf", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def create_refresh_graph(
+    node_wrapper: NodeWrapper | None = None,
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> StateGraph:
+    """Builds the graph that refreshes an earlier run's report.
+
+    It runs one search iteration limited to sources published since that run,
+    merges them into the findings and updates the report sections they belong
+    to. The initial state comes from `create_refresh_state()`.
+    """
+    workflow = StateGraph(ResearchState)
+
+    _add_node(workflow, "refresh_queries", refresh_queries_node, node_wrapper)
+    _add_node(workflow, "search", search_node, node_wrapper)
+    _add_node(workflow, "refresh_findings", refresh_findings_node, node_wrapper)
+    _add_node(workflow, "refresh_report", refresh_report_node, node_wrapper)
+    _add_node(workflow, "save_pdf", save_pdf_node, node_wrapper)
+
+    workflow.add_edge(START, "refresh_queries")
+    workflow.add_edge("refresh_queries", "search")
+    workflow.add_edge("search", "refresh_findings")
+    workflow.add_edge("refresh_findings", "refresh_report")
+    workflow.add_edge("refresh_report", "save_pdf")
+    workflow.add_edge("save_pdf", END)
+
+    return workflow.compile(checkpointer=checkpointer)
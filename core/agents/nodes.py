@@ -1,41 +1,108 @@
+import asyncio
+import inspect
+import json
+import logging
+from datetime import UTC, datetime
+
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 
 from ..exceptions import NodeException
-from ..models import ClarifyingQuestions, DecisionOutput, SearchQueries
+from ..models import (
+    ClarifyingQuestions,
+    DecisionOutput,
+    OutlineSection,
+    ReportOutline,
+    ResearchPlan,
+    SearchQueries,
+)
 from ..prompts import (
     CLARIFY_SYSTEM_PROMPT,
-    COMPRESSION_SYSTEM_PROMPT,
-    DECIDE_SYSTEM_PROMPT,
+    DECOMPOSE_SYSTEM_PROMPT,
     FILENAME_GENERATION_SYSTEM_PROMPT,
-    GENERATE_QUERIES_SYSTEM_PROMPT,
-    GENERATE_REPORT_SYSTEM_PROMPT,
     RESEARCH_BRIEF_SYSTEM_PROMPT,
+    RESEARCH_SYSTEM_PROMPT,
     build_clarify_user_prompt,
     build_compression_user_prompt,
+    build_decompose_user_prompt,
     build_filename_user_prompt,
     build_generate_queries_user_prompt,
     build_reflection_user_prompt,
+    build_refresh_findings_user_prompt,
+    build_refresh_queries_user_prompt,
+    build_report_outline_user_prompt,
+    build_report_section_user_prompt,
     build_report_user_prompt,
     build_research_brief_user_prompt,
+    build_section_update_user_prompt,
+    prompt_cache_key,
+)
+from ..services import OpenAIClient, SearchOutcome, get_mcp_client, get_search_fanout
+from ..utils import (
+    JSONArrayStreamParser,
+    expand_citations,
+    preprocess_search_result,
+    remap_citations,
+    save_report_to_disk,
+    save_run_artifact,
+    tokenize,
 )
-from ..services import ExaClient, OpenAIClient
-from ..utils import save_report_to_disk
-from .state import ResearchState
+from .deferred import DeferredOpenAIClient
+from .planner import RESULTS_PER_QUERY, can_iterate, plan_search, remaining_searches
+from .refresh import (
+    assign_sources,
+    join_sections,
+    run_artifact,
+    section_heading,
+    split_sections,
+)
+from .retrieval import choose_num_results, query_type, result_hits, update_stats
+from .state import ResearchState, source_key
+
+logger = logging.getLogger(__name__)
 
+DEFAULT_MIN_ITERATIONS = 3
+DEFAULT_MAX_ITERATIONS = 5
+DEFAULT_SUBTOPIC_MAX_ITERATIONS = 2
+MAX_SUBTOPICS = 5
+MAX_REPORT_SECTIONS = 8
+PREFETCH_QUERIES = 3
 
-def clarify_node(state: ResearchState) -> ResearchState:
+# A prefetched source is kept if the refined brief covers most of its query
+PREFETCH_MIN_TERM_COVERAGE = 0.6
+
+
+def _llm(state: ResearchState) -> OpenAIClient:
+    # Deferred runs get their completions from the Batch API
+    return DeferredOpenAIClient() if state.get("deferred") else OpenAIClient()
+
+
+async def clarify_node(
+    state: ResearchState, config: RunnableConfig | None = None
+) -> ResearchState:
     messages = state["messages"]
     original_query = messages[0].content
 
-    llm = OpenAIClient()
+    llm = _llm(state)
+
+    # Research the raw topic while the questions are being answered
+    prefetched_results = []
+    prefetch_usage = []
+    prefetch = None
+    if state.get("prefetch"):
+        prefetch = asyncio.create_task(
+            _prefetch(state, original_query, llm, prefetched_results, prefetch_usage)
+        )
 
     user_prompt = build_clarify_user_prompt(original_query)
 
-    response = llm.call(
+    response = await llm.acall(
         system_prompt=CLARIFY_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.5,
         response_format=ClarifyingQuestions,
+        label="clarify",
     )
 
     questions = response.questions
@@ -48,52 +115,181 @@ def clarify_node(state: ResearchState) -> ResearchState:
         )
     )
 
-    print(f"\n{messages[-1].content}\n")
+    # Answers come from the state, a callback in the run config, or the terminal
+    given_answers = state.get("clarification_answers")
+    answer_questions = (config or {}).get("configurable", {}).get("answer_questions")
+
+    if given_answers is None and answer_questions is not None:
+        given_answers = answer_questions(questions)
+        if inspect.isawaitable(given_answers):
+            given_answers = await given_answers
+
+    if given_answers is None:
+        print(f"\n{messages[-1].content}\n")
 
     answers = []
     for i, question in enumerate(questions):
-        answer = input(f"Answer {i + 1}: ").strip()
+        if given_answers is None:
+            answer = (await asyncio.to_thread(input, f"Answer {i + 1}: ")).strip()
+        else:
+            answer = given_answers[i] if i < len(given_answers) else ""
         answers.append(f"Q: {question}\nA: {answer}")
 
     answers_text = "\n\n".join(answers)
     messages.append(HumanMessage(content=f"Here are my answers:\n\n{answers_text}"))
 
-    return {"messages": messages}
+    # Searches still running are dropped here but still fill the knowledge base
+    if prefetch is not None:
+        prefetch.cancel()
+        await asyncio.gather(prefetch, return_exceptions=True)
+        logger.info("Prefetched %d sources", len(prefetched_results))
 
+    return {
+        "messages": messages,
+        "prefetched_results": prefetched_results,
+        "llm_usage": llm.usage,
+        "search_usage": prefetch_usage,
+    }
+
+
+async def _prefetch(
+    state: ResearchState,
+    topic: str,
+    llm: OpenAIClient,
+    results: list[dict],
+    search_usage: list[dict],
+) -> None:
+    num_queries = min(PREFETCH_QUERIES, remaining_searches(state))
+    if num_queries < 1:
+        return
+
+    try:
+        response = await llm.acall(
+            system_prompt=RESEARCH_SYSTEM_PROMPT,
+            user_prompt=build_generate_queries_user_prompt(
+                research_brief=topic,
+                search_iteration=0,
+                num_queries=num_queries,
+            ),
+            temperature=0.7,
+            response_format=SearchQueries,
+            label="prefetch",
+        )
+    except Exception as e:
+        logger.warning("Prefetch failed: %s", e)
+        return
 
-def research_brief_node(state: ResearchState) -> ResearchState:
+    fanout = get_search_fanout()
+
+    async def fetch(query: str) -> None:
+        try:
+            outcome = await fanout.afetch(query, num_results=RESULTS_PER_QUERY)
+        except Exception as e:
+            logger.warning("Prefetch search failed for query: %s: %s", query, e)
+            return
+
+        results.extend(outcome.results)
+        search_usage.append(
+            {
+                "query": query,
+                "num_results": RESULTS_PER_QUERY,
+                "web_calls": outcome.web_calls,
+                "latency": outcome.latency,
+            }
+        )
+
+    await asyncio.gather(*(fetch(query) for query in response.queries[:num_queries]))
+
+
+def _relevant_prefetch(results: list[dict], research_brief: str) -> list[dict]:
+    brief_terms = set(tokenize(research_brief))
+
+    relevant = []
+    for result in results:
+        query_terms = set(tokenize(result.get("query", "")))
+        if not query_terms:
+            continue
+        coverage = len(query_terms & brief_terms) / len(query_terms)
+        if coverage >= PREFETCH_MIN_TERM_COVERAGE:
+            relevant.append(preprocess_search_result(result, research_brief))
+
+    return relevant
+
+
+async def research_brief_node(state: ResearchState) -> ResearchState:
     messages = state["messages"]
 
-    llm = OpenAIClient()
+    llm = _llm(state)
 
     user_prompt = build_research_brief_user_prompt(messages)
 
-    research_brief = llm.call(
+    research_brief = await llm.acall(
         system_prompt=RESEARCH_BRIEF_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.5,
+        label="research_brief",
     )
 
-    print(f"Research brief:\n{research_brief}")
+    logger.info("Research brief:\n%s", research_brief)
+
+    subtopics = []
+    if state.get("decompose"):
+        plan = await llm.acall(
+            system_prompt=DECOMPOSE_SYSTEM_PROMPT,
+            user_prompt=build_decompose_user_prompt(research_brief, MAX_SUBTOPICS),
+            temperature=0.3,
+            response_format=ResearchPlan,
+            label="research_brief",
+        )
+        subtopics = [subtopic.model_dump() for subtopic in plan.subtopics]
+
+        # A single subtopic is just the original brief, research it directly
+        if len(subtopics) < 2:
+            subtopics = []
+
+        for subtopic in subtopics:
+            logger.info("Subtopic: %s", subtopic["name"])
+
+    # The first iteration starts from the prefetched sources that still apply
+    prefetched = _relevant_prefetch(
+        state.get("prefetched_results") or [], research_brief
+    )
+    if prefetched:
+        logger.info("Reusing %d prefetched sources", len(prefetched))
 
     return {
         "research_brief": research_brief,
+        "subtopics": subtopics[:MAX_SUBTOPICS],
+        "search_results": prefetched,
+        "llm_usage": llm.usage,
     }
 
 
-def generate_queries_node(state: ResearchState) -> ResearchState:
+async def generate_queries_node(state: ResearchState) -> ResearchState:
     research_brief = state.get("research_brief", "")
     search_iteration = state.get("search_iteration", 0)
 
-    llm = OpenAIClient()
-
-    iteration_context = search_iteration + 1
-    num_queries = 5 if search_iteration == 0 else 3
-
-    system_prompt = GENERATE_QUERIES_SYSTEM_PROMPT.format(
-        iteration_context=iteration_context,
-        num_queries=num_queries,
-    )
+    num_queries, max_results = plan_search(state)
+    if not num_queries:
+        logger.info("Search budget used up, skipping searches")
+        return {"search_queries": [], "search_num_results": {}}
+
+    llm = _llm(state)
+
+    # Each query asks for as many results as queries like it have been yielding
+    retrieval_stats = state.get("retrieval_stats") or {}
+    previous_queries = [search["query"] for search in state.get("search_usage", [])]
+    num_results = {}
+
+    def results_for(query: str) -> int:
+        if query not in num_results:
+            num_results[query] = choose_num_results(
+                retrieval_stats,
+                query_type(query, previous_queries),
+                default=RESULTS_PER_QUERY,
+                ceiling=max_results,
+            )
+        return num_results[query]
 
     user_prompt = build_generate_queries_user_prompt(
         research_brief=research_brief,
@@ -103,84 +299,144 @@ def generate_queries_node(state: ResearchState) -> ResearchState:
         knowledge_gaps=state.get("knowledge_gaps", []),
     )
 
-    response = llm.call(
-        system_prompt=system_prompt,
+    fanout = get_search_fanout()
+    parser = JSONArrayStreamParser("queries")
+
+    # Each query starts searching as soon as the model finishes writing it, up
+    # to the number planned; any further queries are cut below
+    content = []
+    submitted = 0
+    async for chunk in llm.astream(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.7,
-        response_format=SearchQueries,
+        json_output=True,
+        label="generate_queries",
+        prompt_cache_key=prompt_cache_key(research_brief),
+    ):
+        content.append(chunk)
+        for query in parser.feed(chunk):
+            if submitted < num_queries:
+                fanout.submit(query, num_results=results_for(query))
+                submitted += 1
+
+    try:
+        response = SearchQueries(**json.loads("".join(content)))
+    except Exception as e:
+        raise NodeException("Failed to parse generated search queries") from e
+
+    queries = response.queries[:num_queries]
+
+    logger.info(
+        "Generated search queries (iteration %d):\n%s",
+        search_iteration + 1,
+        "\n".join(
+            f"{i}. {query} ({results_for(query)} results)"
+            for i, query in enumerate(queries, 1)
+        ),
     )
 
-    queries = response.queries
-
-    print(f"Generated search queries (iteration {search_iteration + 1}):")
-    for i, query in enumerate(queries, 1):
-        print(f"{i}. {query}")
-    print()
-
     return {
         "search_queries": queries,
+        "search_num_results": {query: results_for(query) for query in queries},
+        "llm_usage": llm.usage,
     }
 
 
-def search_node(state: ResearchState) -> ResearchState:
+async def search_node(state: ResearchState) -> ResearchState:
     search_queries = state.get("search_queries", [])
-    search_results = state.get("search_results", [])
     search_iteration = state.get("search_iteration", 0)
+    research_brief = state.get("research_brief") or ""
+    num_results = state.get("search_num_results") or {}
+    published_after = state.get("published_after")
 
+    # Nothing to search once the search budget is used up
     if not search_queries:
-        raise NodeException("No search queries found in state")
+        return {"search_iteration": search_iteration + 1}
+
+    fanout = get_search_fanout()
 
-    exa = ExaClient()
+    logger.info("Executing searches (iteration %d)", search_iteration + 1)
 
-    print(f"Executing searches (iteration {search_iteration + 1}):")
+    # Queries streamed from generate_queries_node are already running
+    def results_for(query: str) -> int:
+        return num_results.get(query, RESULTS_PER_QUERY)
 
     for query in search_queries:
+        fanout.submit(query, results_for(query), published_after)
+
+    async def fetch(query: str) -> SearchOutcome:
         try:
-            results = exa.call(
-                query=query,
-                num_results=5,
-                text={"max_characters": 2000},
-            )
+            return await fanout.afetch(query, results_for(query), published_after)
+        except Exception as e:
+            raise NodeException(f"Error executing search for query: {query}") from e
 
-            # Add the search query to each result for reference in compression prompt
-            for result in results:
-                result["query"] = query
+    outcomes = await asyncio.gather(*(fetch(query) for query in search_queries))
 
-            search_results.extend(results)
+    retrieval_stats = state.get("retrieval_stats") or {}
+    previous_queries = [search["query"] for search in state.get("search_usage", [])]
+    known = list(state.get("search_results", []))
 
-        except Exception as e:
-            raise NodeException(f"Error executing search for query: {query}") from e
+    search_results = []
+    search_usage = []
+    for query, outcome in zip(search_queries, outcomes, strict=True):
+        for result in outcome.results:
+            preprocess_search_result(result, research_brief)
+
+        hits = result_hits(outcome.results, known)
+        retrieval_stats = update_stats(
+            retrieval_stats, query_type(query, previous_queries), hits
+        )
+        known.extend(outcome.results)
+
+        search_results.extend(outcome.results)
+        search_usage.append(
+            {
+                "query": query,
+                "num_results": results_for(query),
+                "web_calls": outcome.web_calls,
+                "latency": outcome.latency,
+                "new_sources": sum(hits),
+            }
+        )
 
     return {
         "search_queries": search_queries,
         "search_results": search_results,
         "search_iteration": search_iteration + 1,
+        "search_usage": search_usage,
+        "retrieval_stats": retrieval_stats,
     }
 
 
-def mcp_tool_node(state: ResearchState) -> ResearchState:
+async def mcp_tool_node(state: ResearchState) -> ResearchState:
     """
-    Connects with Model Context Protocol (MCP) servers to augment research.
+    Fans the current search queries out to the configured Model Context Protocol
+    (MCP) servers and adds their results to the shared source pipeline.
     """
+    search_queries = state.get("search_queries", [])
+
+    mcp = get_mcp_client()
+    if not mcp.enabled or not search_queries:
+        return {}
+
+    results = await mcp.acall(search_queries)
+    for result in results:
+        preprocess_search_result(result, state.get("research_brief") or "")
 
-    # Basic MCP integration (https://docs.langchain.com/oss/python/langchain/mcp)
-    # server_configs = {}
-    # mcp_client = MultiServerMCPClient(server_configs)
-    # tools = await mcp_client.get_tools()
-    # agent = create_agent("gpt-4.1", tools=tools)
+    logger.info("Collected %d MCP tool results", len(results))
 
-    # Return dummy results
     return {
-        "mcp_tool_results": "MCP tool results",
+        "search_results": results,
     }
 
 
-def compression_node(state: ResearchState) -> ResearchState:
+async def compression_node(state: ResearchState) -> ResearchState:
     research_brief = state.get("research_brief", "")
     search_results = state.get("search_results", [])
     search_iteration = state.get("search_iteration", 0)
 
-    llm = OpenAIClient()
+    llm = _llm(state)
 
     user_prompt = build_compression_user_prompt(
         research_brief=research_brief,
@@ -188,42 +444,48 @@ def compression_node(state: ResearchState) -> ResearchState:
         search_iteration=search_iteration,
     )
 
-    compressed_findings = llm.call(
-        system_prompt=COMPRESSION_SYSTEM_PROMPT,
+    compressed_findings = await llm.acall(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.2,
+        label="compress",
+        prompt_cache_key=prompt_cache_key(research_brief),
     )
 
     return {
         "compressed_findings": compressed_findings,
+        "llm_usage": llm.usage,
     }
 
 
-def reflection_node(state: ResearchState) -> ResearchState:
+async def reflection_node(state: ResearchState) -> ResearchState:
     research_brief = state.get("research_brief", "")
     compressed_findings = state.get("compressed_findings", "")
     search_iteration = state.get("search_iteration", 0)
+    min_iterations = state.get("min_iterations", DEFAULT_MIN_ITERATIONS)
+    max_iterations = state.get("max_iterations", DEFAULT_MAX_ITERATIONS)
 
-    llm = OpenAIClient()
-
-    system_prompt = DECIDE_SYSTEM_PROMPT.format(num_iterations=search_iteration)
+    llm = _llm(state)
 
     user_prompt = build_reflection_user_prompt(
         research_brief=research_brief,
         compressed_findings=compressed_findings,
         search_iteration=search_iteration,
+        max_iterations=max_iterations,
     )
 
-    response = llm.call(
-        system_prompt=system_prompt,
+    response = await llm.acall(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.3,
         response_format=DecisionOutput,
+        label="reflect",
+        prompt_cache_key=prompt_cache_key(research_brief),
     )
 
-    print(f"Thought process:\n{response.thought_process}")
+    logger.info("Thought process:\n%s", response.thought_process)
 
-    force_continue = search_iteration < 3
+    force_continue = search_iteration < min_iterations
     needs_more = response.needs_more_context or force_continue
 
     return {
@@ -231,11 +493,39 @@ def reflection_node(state: ResearchState) -> ResearchState:
         if response.needs_more_context
         else [],
         "knowledge_gaps": response.knowledge_gaps,
-        "needs_more_context": needs_more and search_iteration < 5,
+        "needs_more_context": needs_more
+        and search_iteration < max_iterations
+        and can_iterate(state),
+        "llm_usage": llm.usage,
+    }
+
+
+def merge_subtopics_node(state: ResearchState) -> ResearchState:
+    search_results = state.get("search_results", [])
+    subtopic_findings = state.get("subtopic_findings", [])
+
+    # Subgraphs number their sources independently, map them to this run's IDs
+    run_ids = {source_key(result): result["source_id"] for result in search_results}
+
+    sections = []
+    for entry in subtopic_findings:
+        id_map = {
+            local_id: run_ids[key]
+            for local_id, key in entry["sources"].items()
+            if key in run_ids
+        }
+        findings = remap_citations(entry["findings"] or "", id_map)
+        sections.append(f"## {entry['subtopic']}\n\n{findings}")
+
+    return {
+        "compressed_findings": "\n\n".join(sections),
+        "search_iteration": max(
+            (entry["search_iteration"] for entry in subtopic_findings), default=0
+        ),
     }
 
 
-def generate_report_node(state: ResearchState) -> ResearchState:
+async def generate_report_node(state: ResearchState) -> ResearchState:
     research_brief = state.get("research_brief", "")
     compressed_findings = state.get("compressed_findings", "")
     search_results = state.get("search_results", [])
@@ -243,8 +533,35 @@ def generate_report_node(state: ResearchState) -> ResearchState:
 
     original_query = messages[0].content
 
-    llm = OpenAIClient()
+    llm = _llm(state)
+
+    if state.get("report_mode") == "sections":
+        draft = await _write_sectioned_report(
+            llm, original_query, research_brief, compressed_findings, search_results
+        )
+    else:
+        draft = await _write_report(
+            llm, original_query, research_brief, compressed_findings, search_results
+        )
+
+    report = expand_citations(draft, search_results)
+
+    messages.append(AIMessage(content=report))
+
+    return {
+        "messages": messages,
+        "report_draft": draft,
+        "llm_usage": llm.usage,
+    }
+
 
+async def _write_report(
+    llm: OpenAIClient,
+    original_query: str,
+    research_brief: str,
+    compressed_findings: str,
+    search_results: list[dict],
+) -> str:
     user_prompt = build_report_user_prompt(
         original_query=original_query,
         research_brief=research_brief,
@@ -252,20 +569,238 @@ def generate_report_node(state: ResearchState) -> ResearchState:
         search_results=search_results,
     )
 
-    report = llm.call(
-        system_prompt=GENERATE_REPORT_SYSTEM_PROMPT,
+    # Stream the draft to callers using stream_mode="custom"
+    write = get_stream_writer()
+
+    chunks = []
+    async for chunk in llm.astream(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
         user_prompt=user_prompt,
         temperature=0.4,
+        label="generate_report",
+        prompt_cache_key=prompt_cache_key(research_brief),
+    ):
+        chunks.append(chunk)
+        write({"report_chunk": chunk})
+
+    return "".join(chunks)
+
+
+async def _write_sectioned_report(
+    llm: OpenAIClient,
+    original_query: str,
+    research_brief: str,
+    compressed_findings: str,
+    search_results: list[dict],
+) -> str:
+    cache_key = prompt_cache_key(research_brief)
+
+    outline = await llm.acall(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
+        user_prompt=build_report_outline_user_prompt(
+            original_query=original_query,
+            research_brief=research_brief,
+            compressed_findings=compressed_findings,
+            search_results=search_results,
+            max_sections=MAX_REPORT_SECTIONS,
+        ),
+        temperature=0.3,
+        response_format=ReportOutline,
+        label="report_outline",
+        prompt_cache_key=cache_key,
+    )
+    sections = outline.sections[:MAX_REPORT_SECTIONS]
+
+    logger.info("Writing %d report sections", len(sections))
+
+    outline_text = "\n".join(
+        f"{i}. {section.heading}: {section.description}"
+        for i, section in enumerate(sections, 1)
+    )
+    sources_by_id = {result["source_id"]: result for result in search_results}
+
+    async def write_section(section: OutlineSection) -> str:
+        source_ids = dict.fromkeys(
+            source_id.strip("[] ") for source_id in section.source_ids
+        )
+        body = await llm.acall(
+            system_prompt=RESEARCH_SYSTEM_PROMPT,
+            user_prompt=build_report_section_user_prompt(
+                original_query=original_query,
+                research_brief=research_brief,
+                compressed_findings=compressed_findings,
+                outline=outline_text,
+                heading=section.heading,
+                description=section.description,
+                section_sources=[
+                    sources_by_id[source_id]
+                    for source_id in source_ids
+                    if source_id in sources_by_id
+                ],
+            ),
+            temperature=0.4,
+            label="report_section",
+            prompt_cache_key=cache_key,
+        )
+        return f"## {section.heading}\n\n{_strip_heading(body, section.heading)}"
+
+    write = get_stream_writer()
+    parts = [f"# {outline.title}"]
+    write({"report_chunk": f"{parts[0]}\n\n"})
+
+    # Sections are written concurrently and streamed in reading order
+    tasks = [asyncio.create_task(write_section(section)) for section in sections]
+    try:
+        for task in tasks:
+            parts.append(await task)
+            write({"report_chunk": f"{parts[-1]}\n\n"})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return "\n\n".join(parts)
+
+
+def _strip_heading(body: str, heading: str) -> str:
+    # Models sometimes repeat the section heading they were asked to leave out
+    first_line, _, rest = body.strip().partition("\n")
+    if first_line.startswith("#") and heading.lower() in first_line.lower():
+        return rest.strip()
+    return body.strip()
+
+
+async def refresh_queries_node(state: ResearchState) -> ResearchState:
+    research_brief = state.get("research_brief", "")
+
+    num_queries, _ = plan_search(state)
+    if not num_queries:
+        logger.info("Search budget used up, skipping searches")
+        return {"search_queries": [], "search_num_results": {}}
+
+    llm = _llm(state)
+
+    response = await llm.acall(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
+        user_prompt=build_refresh_queries_user_prompt(
+            research_brief=research_brief,
+            compressed_findings=state.get("compressed_findings", ""),
+            published_after=state["published_after"],
+            num_queries=num_queries,
+        ),
+        temperature=0.7,
+        response_format=SearchQueries,
+        label="generate_queries",
+        prompt_cache_key=prompt_cache_key(research_brief),
+    )
+    queries = response.queries[:num_queries]
+
+    logger.info(
+        "Searching for sources published since %s:\n%s",
+        state["published_after"][:10],
+        "\n".join(f"{i}. {query}" for i, query in enumerate(queries, 1)),
+    )
+
+    return {
+        "search_queries": queries,
+        "search_num_results": dict.fromkeys(queries, RESULTS_PER_QUERY),
+        "llm_usage": llm.usage,
+    }
+
+
+async def refresh_findings_node(state: ResearchState) -> ResearchState:
+    research_brief = state.get("research_brief", "")
+    new_sources = state.get("search_results", [])[state["previous_source_count"] :]
+
+    if not new_sources:
+        logger.info("No new sources found")
+        return {}
+
+    llm = _llm(state)
+
+    user_prompt = build_refresh_findings_user_prompt(
+        research_brief=research_brief,
+        compressed_findings=state.get("compressed_findings", ""),
+        new_sources=new_sources,
+    )
+
+    compressed_findings = await llm.acall(
+        system_prompt=RESEARCH_SYSTEM_PROMPT,
+        user_prompt=user_prompt,
+        temperature=0.2,
+        label="compress",
+        prompt_cache_key=prompt_cache_key(research_brief),
     )
 
+    logger.info("Merged %d new sources into the findings", len(new_sources))
+
+    return {
+        "compressed_findings": compressed_findings,
+        "llm_usage": llm.usage,
+    }
+
+
+async def refresh_report_node(state: ResearchState) -> ResearchState:
+    research_brief = state.get("research_brief", "")
+    compressed_findings = state.get("compressed_findings", "")
+    search_results = state.get("search_results", [])
+    new_sources = search_results[state["previous_source_count"] :]
+    messages = state["messages"]
+
+    original_query = messages[0].content
+
+    llm = _llm(state)
+
+    sections = split_sections(state["report_draft"])
+    assigned = assign_sources(sections, new_sources)
+
+    logger.info(
+        "Updating %d of %d report sections with %d of %d new sources",
+        len(assigned),
+        len(sections),
+        sum(map(len, assigned.values())),
+        len(new_sources),
+    )
+
+    async def update_section(i: int) -> str:
+        heading, body = sections[i]
+        updated = await llm.acall(
+            system_prompt=RESEARCH_SYSTEM_PROMPT,
+            user_prompt=build_section_update_user_prompt(
+                original_query=original_query,
+                research_brief=research_brief,
+                compressed_findings=compressed_findings,
+                heading=section_heading(heading) or "Introduction",
+                section=body,
+                new_sources=assigned[i],
+            ),
+            temperature=0.4,
+            label="report_section",
+            prompt_cache_key=prompt_cache_key(research_brief),
+        )
+        return _strip_heading(updated, section_heading(heading)) if heading else updated
+
+    updates = await asyncio.gather(*(update_section(i) for i in assigned))
+    for i, body in zip(assigned, updates, strict=True):
+        sections[i] = (sections[i][0], body.strip())
+
+    draft = join_sections(sections)
+
+    # Like the other report modes, the draft is streamed with its source IDs
+    write = get_stream_writer()
+    write({"report_chunk": draft})
+
+    report = expand_citations(draft, search_results)
+
     messages.append(AIMessage(content=report))
 
     return {
         "messages": messages,
+        "report_draft": draft,
+        "llm_usage": llm.usage,
     }
 
 
-def save_pdf_node(state: ResearchState) -> ResearchState:
+async def save_pdf_node(state: ResearchState) -> ResearchState:
     messages = state["messages"]
 
     report_content = None
@@ -278,20 +813,37 @@ def save_pdf_node(state: ResearchState) -> ResearchState:
         raise NodeException("No report content found in messages")
 
     original_query = messages[0].content
+    reports_dir = state.get("reports_dir", "reports")
 
-    llm = OpenAIClient()
-    user_prompt = build_filename_user_prompt(original_query)
+    llm = _llm(state)
 
-    filename = llm.call(
-        system_prompt=FILENAME_GENERATION_SYSTEM_PROMPT,
-        user_prompt=user_prompt,
-        temperature=0.2,
-    ).strip()
+    # Refreshed reports overwrite the files of the run they refresh
+    filename = state.get("report_filename")
+    if not filename:
+        user_prompt = build_filename_user_prompt(original_query)
 
-    save_report_to_disk(
+        filename = await llm.acall(
+            system_prompt=FILENAME_GENERATION_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            temperature=0.2,
+            label="save_pdf",
+        )
+        filename = filename.strip()
+
+    # PDF rendering is CPU-bound, keep it off the event loop
+    await asyncio.to_thread(
+        save_report_to_disk,
         report_content=report_content,
         filename=filename,
-        reports_dir="reports",
+        reports_dir=reports_dir,
+    )
+
+    # Everything a later refresh needs to update the report
+    researched_at = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    save_run_artifact(
+        run_artifact(state, filename, researched_at),
+        filename=filename,
+        reports_dir=reports_dir,
     )
 
-    return state
+    return {"report_filename": filename, "llm_usage": llm.usage}
@@ -0,0 +1,172 @@
+import math
+import time
+
+from .state import ResearchState
+
+INITIAL_QUERIES = 5
+FOLLOW_UP_QUERIES = 3
+RESULTS_PER_QUERY = 5
+MIN_RESULTS_PER_QUERY = 2
+MAX_RESULTS_PER_QUERY = 10
+
+# Used until the run has measured its own calls
+DEFAULT_ITERATION_TOKENS = 20000
+DEFAULT_ITERATION_SECONDS = 45.0
+DEFAULT_REPORT_TOKENS = 15000
+DEFAULT_REPORT_SECONDS = 90.0
+
+# Report output is several times longer than any research step's output
+REPORT_COMPLETION_TOKENS = 4000
+REPORT_LATENCY_FACTOR = 3.0
+SAFETY_MARGIN = 1.2
+
+_ITERATION_LABELS = ("generate_queries", "compress", "reflect")
+
+
+def spent_tokens(state: ResearchState) -> int:
+    return sum(
+        call["prompt_tokens"] + call["completion_tokens"]
+        for call in state.get("llm_usage", [])
+    )
+
+
+def spent_searches(state: ResearchState) -> int:
+    return sum(search["web_calls"] for search in state.get("search_usage", []))
+
+
+def remaining_tokens(state: ResearchState) -> float:
+    budget = state.get("token_budget")
+    if budget is None:
+        return math.inf
+    return budget - spent_tokens(state) - estimate_report_tokens(state)
+
+
+def remaining_searches(state: ResearchState) -> float:
+    budget = state.get("search_budget")
+    if budget is None:
+        return math.inf
+    return budget - spent_searches(state)
+
+
+def remaining_seconds(state: ResearchState) -> float:
+    deadline = state.get("deadline")
+    if deadline is None:
+        return math.inf
+    return deadline - time.time() - estimate_report_seconds(state)
+
+
+def estimate_iteration_cost(state: ResearchState) -> tuple[float, float]:
+    calls = [
+        call
+        for call in state.get("llm_usage", [])
+        if call["label"] in _ITERATION_LABELS
+    ]
+    iterations = state.get("search_iteration", 0)
+    if not calls or not iterations:
+        return DEFAULT_ITERATION_TOKENS, DEFAULT_ITERATION_SECONDS
+
+    tokens = sum(call["prompt_tokens"] + call["completion_tokens"] for call in calls)
+    # Each iteration sends more sources to compression, so the latest is a floor
+    latest_compression = max(
+        (call["prompt_tokens"] for call in calls if call["label"] == "compress"),
+        default=0,
+    )
+
+    # Searches within an iteration run concurrently
+    llm_seconds = sum(call["latency"] for call in calls)
+    search_seconds = max(
+        (search["latency"] for search in state.get("search_usage", [])), default=0.0
+    )
+
+    return (
+        max(tokens / iterations, latest_compression) * SAFETY_MARGIN,
+        (llm_seconds / iterations + search_seconds) * SAFETY_MARGIN,
+    )
+
+
+def estimate_report_tokens(state: ResearchState) -> float:
+    if not state.get("reserve_report", True):
+        return 0
+
+    compress_calls = [
+        call for call in state.get("llm_usage", []) if call["label"] == "compress"
+    ]
+    if not compress_calls:
+        return DEFAULT_REPORT_TOKENS
+
+    # The report prompt holds the same sources as compression plus the findings
+    prompt_tokens = (
+        compress_calls[-1]["prompt_tokens"] + compress_calls[-1]["completion_tokens"]
+    )
+    return (prompt_tokens + REPORT_COMPLETION_TOKENS) * SAFETY_MARGIN
+
+
+def estimate_report_seconds(state: ResearchState) -> float:
+    if not state.get("reserve_report", True):
+        return 0.0
+
+    compress_calls = [
+        call for call in state.get("llm_usage", []) if call["label"] == "compress"
+    ]
+    if not compress_calls:
+        return DEFAULT_REPORT_SECONDS
+
+    return compress_calls[-1]["latency"] * REPORT_LATENCY_FACTOR * SAFETY_MARGIN
+
+
+def can_iterate(state: ResearchState) -> bool:
+    tokens, seconds = estimate_iteration_cost(state)
+
+    return (
+        remaining_tokens(state) >= tokens
+        and remaining_seconds(state) >= seconds
+        and remaining_searches(state) >= 1
+    )
+
+
+def plan_search(state: ResearchState) -> tuple[int, int]:
+    """Returns the number of queries for the next iteration and the most results
+    any of them may request. No queries are planned once the search budget is
+    used up or no tokens or time are left for searching."""
+    search_iteration = state.get("search_iteration", 0)
+    num_queries = INITIAL_QUERIES if search_iteration == 0 else FOLLOW_UP_QUERIES
+    max_results = MAX_RESULTS_PER_QUERY
+
+    tokens, seconds = estimate_iteration_cost(state)
+
+    # Scale the iteration down to the share of the envelope that is left
+    scale = min(
+        1.0,
+        remaining_tokens(state) / tokens,
+        remaining_seconds(state) / seconds,
+    )
+    if scale <= 0:
+        return 0, MIN_RESULTS_PER_QUERY
+    if scale < 1.0:
+        num_queries = max(1, math.floor(num_queries * scale))
+        max_results = max(MIN_RESULTS_PER_QUERY, math.floor(RESULTS_PER_QUERY * scale))
+
+    num_queries = min(num_queries, max(remaining_searches(state), 0))
+
+    return int(num_queries), max_results
+
+
+def split_budget(state: ResearchState, parts: int) -> dict:
+    # Subtopics share what is left after reserving the report, which the parent
+    # graph generates
+    budget = {
+        "deadline": None,
+        "token_budget": None,
+        "search_budget": None,
+        "reserve_report": False,
+    }
+
+    if state.get("deadline") is not None:
+        budget["deadline"] = state["deadline"] - estimate_report_seconds(state)
+    if state.get("token_budget") is not None:
+        budget["token_budget"] = int(max(remaining_tokens(state), 0) / parts)
+    if state.get("search_budget") is not None:
+        # Shares are rounded down so together they stay within the budget
+        budget["search_budget"] = int(max(remaining_searches(state), 0) // parts)
+
+    return budget
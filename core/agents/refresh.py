@@ -0,0 +1,126 @@
+"""Incremental refresh of an earlier run's report.
+
+Every run saves an artifact next to its report with the research brief, the
+compressed findings, the sources and the report draft (with source IDs rather
+than links). A refresh loads it, searches only for pages published since the
+run, merges the new sources into the findings, and rewrites the report sections
+the new sources belong to, leaving the rest of the draft as it was.
+
+The functions here are pure so section matching can be tested offline.
+"""
+
+import math
+import re
+from collections import Counter
+
+from ..utils import tokenize
+from .state import ResearchState
+
+ARTIFACT_VERSION = 1
+
+# A new source goes to the section most similar to it if the cosine similarity
+# of their term counts is at least this
+MIN_SECTION_SIMILARITY = 0.1
+
+_HEADING = re.compile(r"^(#{1,6})\s+\S")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def run_artifact(state: ResearchState, filename: str, researched_at: str) -> dict:
+    messages = state["messages"]
+    return {
+        "version": ARTIFACT_VERSION,
+        "topic": messages[0].content,
+        "researched_at": researched_at,
+        "filename": filename,
+        "research_brief": state.get("research_brief"),
+        "compressed_findings": state.get("compressed_findings"),
+        "search_iteration": state.get("search_iteration", 0),
+        "sources": state.get("search_results", []),
+        "report_draft": state.get("report_draft"),
+    }
+
+
+def split_sections(report: str) -> list[tuple[str, str]]:
+    """Splits a markdown report into `(heading line, body)` pairs at its section
+    headings, the shallowest heading level used more than once.
+
+    Text before the first section is returned with an empty heading line, and a
+    report without repeated headings is returned as one such section.
+    """
+    lines = report.strip().splitlines()
+
+    headings = []
+    in_fence = False
+    for i, line in enumerate(lines):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and (match := _HEADING.match(line)):
+            headings.append((i, len(match[1])))
+
+    levels = Counter(level for _, level in headings)
+    repeated = [level for level, count in levels.items() if count > 1]
+    if not repeated:
+        return [("", report.strip())]
+
+    level = min(repeated)
+    starts = [i for i, heading_level in headings if heading_level == level]
+
+    sections = []
+    if starts[0] > 0:
+        sections.append(("", "\n".join(lines[: starts[0]]).strip()))
+    for start, end in zip(starts, [*starts[1:], len(lines)], strict=True):
+        sections.append((lines[start], "\n".join(lines[start + 1 : end]).strip()))
+
+    return sections
+
+
+def join_sections(sections: list[tuple[str, str]]) -> str:
+    return "\n\n".join(
+        f"{heading}\n\n{body}" if heading else body for heading, body in sections
+    )
+
+
+def section_heading(heading_line: str) -> str:
+    return heading_line.lstrip("#").strip()
+
+
+def assign_sources(
+    sections: list[tuple[str, str]], sources: list[dict]
+) -> dict[int, list[dict]]:
+    """Maps the index of each section to the new sources that belong to it.
+
+    Each source goes to the section whose terms are most similar to its own.
+    The untitled opening section only gets sources when it is the only section.
+    Sources not similar enough to any section are left out.
+    """
+    candidates = [
+        i for i, (heading, _) in enumerate(sections) if heading or len(sections) == 1
+    ]
+    section_terms = {
+        i: Counter(tokenize(f"{sections[i][0]} {sections[i][1]}")) for i in candidates
+    }
+
+    assigned: dict[int, list[dict]] = {}
+    for source in sources:
+        terms = Counter(
+            tokenize(
+                f"{source.get('title') or ''} {source.get('query') or ''} "
+                f"{source.get('excerpt') or source.get('text') or ''}"
+            )
+        )
+        scores = {i: _cosine(terms, section_terms[i]) for i in candidates}
+        best = max(scores, key=scores.get, default=None)
+        if best is not None and scores[best] >= MIN_SECTION_SIMILARITY:
+            assigned.setdefault(best, []).append(source)
+
+    return assigned
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[term] for term, count in a.items())
+    return dot / math.sqrt(
+        sum(c * c for c in a.values()) * sum(c * c for c in b.values())
+    )
@@ -0,0 +1,271 @@
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import cache
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph import StateGraph
+
+from ..exceptions import FileOperationException
+from ..utils import load_run_artifact
+from .events import (
+    BriefReady,
+    FindingsUpdated,
+    QueriesGenerated,
+    ReportChunk,
+    ResearchComplete,
+    ResearchEvent,
+    SourcesAdded,
+)
+from .graph import NodeWrapper, create_graph, create_refresh_graph
+from .nodes import DEFAULT_SUBTOPIC_MAX_ITERATIONS
+from .refresh import ARTIFACT_VERSION
+from .state import ResearchState
+
+Answers = list[str] | Callable[[list[str]], list[str] | Awaitable[list[str]]]
+
+
+def create_initial_state(
+    topic: str,
+    answers: list[str] | None = None,
+    decompose: bool = False,
+    subtopic_iterations: int = DEFAULT_SUBTOPIC_MAX_ITERATIONS,
+    deadline: float | None = None,
+    token_budget: int | None = None,
+    search_budget: int | None = None,
+    reports_dir: str = "reports",
+    report_mode: str = "single",
+    prefetch: bool = False,
+) -> ResearchState:
+    """`deadline` is in seconds from now; `answers` of None asks in the terminal."""
+    return {
+        "messages": [HumanMessage(content=topic)],
+        "research_brief": None,
+        "search_queries": [],
+        "search_results": [],
+        "compressed_findings": None,
+        "knowledge_gaps": [],
+        "search_iteration": 0,
+        "needs_more_context": True,
+        "llm_usage": [],
+        "decompose": decompose,
+        "subtopic_max_iterations": subtopic_iterations,
+        "search_usage": [],
+        "deadline": time.time() + deadline if deadline else None,
+        "token_budget": token_budget,
+        "search_budget": search_budget,
+        "clarification_answers": answers,
+        "reports_dir": reports_dir,
+        "report_mode": report_mode,
+        "prefetch": prefetch,
+        "prefetched_results": [],
+    }
+
+
+def create_refresh_state(
+    path: str,
+    deadline: float | None = None,
+    token_budget: int | None = None,
+    search_budget: int | None = None,
+    reports_dir: str | None = None,
+) -> ResearchState:
+    """Initial state for refreshing the report at `path`, its `.json` artifact or
+    one of the report files next to it. `reports_dir` defaults to the report's
+    own directory, so the refreshed report replaces it."""
+    artifact = load_run_artifact(path)
+    if artifact.get("version") != ARTIFACT_VERSION or not artifact.get("report_draft"):
+        raise FileOperationException(f"Unsupported run artifact: {path}")
+
+    sources = artifact["sources"]
+    return {
+        "messages": [HumanMessage(content=artifact["topic"])],
+        "research_brief": artifact["research_brief"],
+        "search_queries": [],
+        "search_results": sources,
+        "compressed_findings": artifact["compressed_findings"],
+        "knowledge_gaps": [],
+        "search_iteration": artifact["search_iteration"],
+        "llm_usage": [],
+        "search_usage": [],
+        "deadline": time.time() + deadline if deadline else None,
+        "token_budget": token_budget,
+        "search_budget": search_budget,
+        "reports_dir": reports_dir or os.path.dirname(path) or ".",
+        "report_draft": artifact["report_draft"],
+        "report_filename": artifact["filename"],
+        "published_after": artifact["researched_at"],
+        "previous_source_count": len(sources),
+    }
+
+
+@cache
+def _graph(node_wrapper: NodeWrapper | None):
+    return create_graph(node_wrapper=node_wrapper)
+
+
+@cache
+def _refresh_graph(node_wrapper: NodeWrapper | None):
+    return create_refresh_graph(node_wrapper=node_wrapper)
+
+
+def research(
+    topic: str,
+    answers: Answers | None = None,
+    *,
+    decompose: bool = False,
+    subtopic_iterations: int = DEFAULT_SUBTOPIC_MAX_ITERATIONS,
+    deadline: float | None = None,
+    token_budget: int | None = None,
+    search_budget: int | None = None,
+    reports_dir: str = "reports",
+    report_mode: str = "single",
+    prefetch: bool = False,
+    node_wrapper: NodeWrapper | None = None,
+) -> AsyncIterator[ResearchEvent]:
+    """Runs the research graph on `topic`, returning its progress as an async
+    iterator of events.
+
+    `answers` are the answers to the clarifying questions, or a function, sync or
+    async, that receives the questions and returns them. Without it the
+    questions are left unanswered. Cancelling the consuming task, or closing the
+    generator, cancels the run.
+
+        async for event in research("...", answers=["...", "..."]):
+            if isinstance(event, ReportChunk):
+                ...
+    """
+    config = {}
+    if callable(answers):
+        config = {"configurable": {"answer_questions": answers}}
+        answers = None
+    elif answers is None:
+        answers = []
+
+    state = create_initial_state(
+        topic,
+        answers=answers,
+        decompose=decompose,
+        subtopic_iterations=subtopic_iterations,
+        deadline=deadline,
+        token_budget=token_budget,
+        search_budget=search_budget,
+        reports_dir=reports_dir,
+        report_mode=report_mode,
+        prefetch=prefetch,
+    )
+
+    return _stream_events(_graph(node_wrapper), state, config)
+
+
+def refresh(
+    path: str,
+    *,
+    deadline: float | None = None,
+    token_budget: int | None = None,
+    search_budget: int | None = None,
+    reports_dir: str | None = None,
+    node_wrapper: NodeWrapper | None = None,
+) -> AsyncIterator[ResearchEvent]:
+    """Refreshes the report at `path` with sources published since it was
+    written, returning the same events as `research()`.
+
+    Only sources added by the refresh are reported as `SourcesAdded`, while
+    `ResearchComplete` holds the whole updated report and all of its sources.
+    """
+    state = create_refresh_state(
+        path,
+        deadline=deadline,
+        token_budget=token_budget,
+        search_budget=search_budget,
+        reports_dir=reports_dir,
+    )
+
+    return _stream_events(_refresh_graph(node_wrapper), state, {})
+
+
+async def _stream_events(
+    graph: StateGraph, state: ResearchState, config: dict
+) -> AsyncIterator[ResearchEvent]:
+    # Subgraph events carry the namespace of the subtopic that produced them
+    subtopics: dict[tuple, str | None] = {}
+    iterations: dict[tuple, int] = {}
+    source_count = len(state.get("search_results", []))
+    values = state
+
+    stream = graph.astream(
+        state,
+        config,
+        stream_mode=["updates", "values", "custom"],
+        subgraphs=True,
+    )
+    try:
+        async for namespace, mode, data in stream:
+            if mode == "custom":
+                if "report_chunk" in data:
+                    yield ReportChunk(data["report_chunk"])
+
+            elif mode == "values":
+                subtopics.setdefault(namespace, data.get("subtopic"))
+                iterations[namespace] = data.get("search_iteration", 0)
+                if namespace:
+                    continue
+
+                # Only the parent's sources carry the IDs the report cites
+                values = data
+                search_results = data.get("search_results", [])
+                if len(search_results) > source_count:
+                    yield SourcesAdded(search_results[source_count:])
+                    source_count = len(search_results)
+
+            else:
+                for node, update in data.items():
+                    for event in _update_events(
+                        node,
+                        update or {},
+                        namespace,
+                        subtopics.get(namespace),
+                        iterations.get(namespace, 0),
+                    ):
+                        yield event
+    finally:
+        await stream.aclose()
+
+    messages = values.get("messages", [])
+    yield ResearchComplete(
+        report=next(
+            (message.content for message in reversed(messages) if message.type == "ai"),
+            "",
+        ),
+        sources=values.get("search_results", []),
+        llm_usage=values.get("llm_usage", []),
+        search_usage=values.get("search_usage", []),
+    )
+
+
+def _update_events(
+    node: str,
+    update: dict,
+    namespace: tuple,
+    subtopic: str | None,
+    iteration: int,
+) -> list[ResearchEvent]:
+    if node == "research_brief":
+        return [BriefReady(update["research_brief"], update.get("subtopics", []))]
+
+    if node in ("generate_queries", "refresh_queries"):
+        return [QueriesGenerated(update["search_queries"], iteration + 1, subtopic)]
+
+    # A refresh without new sources leaves the findings as they were
+    if node == "refresh_findings" and "compressed_findings" in update:
+        return [FindingsUpdated(update["compressed_findings"], iteration)]
+
+    # Subtopic findings cite the subtopic's own source IDs until they are merged
+    if node in ("compress", "merge_subtopics") and not namespace:
+        return [
+            FindingsUpdated(
+                update["compressed_findings"] or "",
+                update.get("search_iteration", iteration),
+            )
+        ]
+
+    return []
@@ -0,0 +1,131 @@
+"""Adaptive result counts for search queries.
+
+Every result a query returns is scored as a hit if it is a source the run has
+not seen yet and it is relevant to its query. The hit rate at each result rank
+is tracked as a moving average per query type, where a query's type is how much
+it overlaps the run's earlier queries. A query is then asked for as many results
+as its type is expected to turn into new sources: fewer when the last ranks were
+mostly duplicates, more when they were still paying off.
+
+The functions here are pure so the policy can be tested and tuned offline.
+"""
+
+from ..utils import tokenize
+from .planner import MAX_RESULTS_PER_QUERY, MIN_RESULTS_PER_QUERY
+from .state import source_key
+
+# Results are requested while the expected hit rate at the next rank is at least this
+MIN_MARGINAL_YIELD = 0.3
+
+# Weight of the latest observation in the moving averages
+SMOOTHING = 0.3
+
+# Unobserved ranks are explored at most this many ranks past the deepest seen
+EXPLORE_STEP = 2
+
+# A result is relevant if it mentions at least this share of its query's terms
+MIN_QUERY_COVERAGE = 0.5
+
+# Pages with the same title are near-duplicates if the title is at least this long
+MIN_TITLE_TERMS = 3
+
+# Share of a query's terms already used by earlier queries for each query type
+REPEAT_OVERLAP = 2 / 3
+RELATED_OVERLAP = 1 / 3
+
+ALL_QUERIES = "all"
+
+
+def query_type(query: str, previous_queries: list[str]) -> str:
+    terms = set(tokenize(query))
+    if not terms:
+        return "novel"
+
+    seen = {term for previous in previous_queries for term in tokenize(previous)}
+    overlap = len(terms & seen) / len(terms)
+    if overlap >= REPEAT_OVERLAP:
+        return "repeat"
+    if overlap >= RELATED_OVERLAP:
+        return "related"
+    return "novel"
+
+
+def _title_key(result: dict) -> str:
+    # Short titles like "Home" are too generic to identify a page
+    terms = tokenize(result.get("title") or "")
+    return " ".join(terms) if len(terms) >= MIN_TITLE_TERMS else ""
+
+
+def result_hits(results: list[dict], known: list[dict]) -> list[bool]:
+    """Whether each result, in rank order, is a new and relevant source.
+
+    Results whose URL or title matches a known source, or an earlier result of
+    the same query, count as duplicates.
+    """
+    seen_keys = {source_key(result) for result in known}
+    seen_titles = {_title_key(result) for result in known} - {""}
+
+    hits = []
+    for result in results:
+        key = source_key(result)
+        title = _title_key(result)
+        duplicate = key in seen_keys or (title and title in seen_titles)
+        seen_keys.add(key)
+        if title:
+            seen_titles.add(title)
+
+        query_terms = set(tokenize(result.get("query") or ""))
+        result_terms = set(
+            tokenize(f"{result.get('title') or ''} {result.get('text') or ''}")
+        )
+        relevant = bool(result_terms) and (
+            not query_terms
+            or len(query_terms & result_terms) / len(query_terms) >= MIN_QUERY_COVERAGE
+        )
+        hits.append(relevant and not duplicate)
+
+    return hits
+
+
+def update_stats(stats: dict, kind: str, hits: list[bool]) -> dict:
+    """Returns `stats` with the hits of one query folded into the hit rates of
+    its query type and of all queries. `stats` is not modified."""
+    updated = {key: list(rates) for key, rates in stats.items()}
+
+    for key in (kind, ALL_QUERIES):
+        rates = updated.setdefault(key, [])
+        for rank, hit in enumerate(hits[:MAX_RESULTS_PER_QUERY]):
+            if rank < len(rates):
+                rates[rank] += SMOOTHING * (float(hit) - rates[rank])
+            else:
+                rates.append(float(hit))
+
+    return updated
+
+
+def choose_num_results(
+    stats: dict,
+    kind: str,
+    default: int,
+    ceiling: int = MAX_RESULTS_PER_QUERY,
+) -> int:
+    """Number of results to request for a query of type `kind`.
+
+    Uses the query type's hit rates, or those of all queries until the type has
+    been seen, and `default` before anything has been observed.
+    """
+    rates = stats.get(kind) or stats.get(ALL_QUERIES)
+    ceiling = max(MIN_RESULTS_PER_QUERY, ceiling)
+    if not rates:
+        return max(MIN_RESULTS_PER_QUERY, min(default, ceiling))
+
+    # Ranks past the deepest observed are assumed to yield like the last one
+    num_results = 0
+    limit = min(ceiling, len(rates) + EXPLORE_STEP)
+    while num_results < limit:
+        expected = rates[min(num_results, len(rates) - 1)]
+        if expected < MIN_MARGINAL_YIELD:
+            break
+        num_results += 1
+
+    return max(MIN_RESULTS_PER_QUERY, num_results)
@@ -1,15 +1,61 @@
-from typing import TypedDict
+import operator
+from typing import Annotated, TypedDict
 
 from langchain_core.messages import BaseMessage
 
+from ..utils.citation_utils import format_source_id
+
+
+def source_key(result: dict) -> str:
+    return result.get("url") or f"{result.get('title')}|{result.get('query')}"
+
+
+def merge_search_results(existing: list[dict], new: list[dict]) -> list[dict]:
+    # Search and MCP nodes both contribute sources, keep the first copy of each
+    seen = {source_key(result) for result in existing}
+
+    merged = list(existing)
+    for result in new:
+        key = source_key(result)
+        if key not in seen:
+            seen.add(key)
+            # IDs follow arrival order so they stay stable for the whole run
+            merged.append({**result, "source_id": format_source_id(len(merged) + 1)})
+
+    return merged
+
 
 class ResearchState(TypedDict):
     messages: list[BaseMessage]
     research_brief: str | None
     search_queries: list[str]
-    search_results: list[dict]
+    search_results: Annotated[list[dict], merge_search_results]
     compressed_findings: str | None
     knowledge_gaps: list[str]
     search_iteration: int
     needs_more_context: bool
-    mcp_tool_results: str | None
+    llm_usage: Annotated[list[dict], operator.add]
+    min_iterations: int
+    max_iterations: int
+    decompose: bool
+    subtopic: str | None
+    subtopics: list[dict]
+    subtopic_max_iterations: int
+    subtopic_findings: Annotated[list[dict], operator.add]
+    search_usage: Annotated[list[dict], operator.add]
+    search_num_results: dict[str, int]
+    retrieval_stats: dict[str, list[float]]
+    deadline: float | None
+    token_budget: int | None
+    search_budget: int | None
+    reserve_report: bool
+    clarification_answers: list[str] | None
+    reports_dir: str
+    report_mode: str
+    prefetch: bool
+    prefetched_results: list[dict]
+    deferred: bool
+    report_draft: str | None
+    report_filename: str | None
+    published_after: str | None
+    previous_source_count: int
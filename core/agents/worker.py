@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from ..exceptions import JobQueueException
+from ..services import Job, JobQueue, SQLiteJobQueue
+from ..services.job_queue import BUSY_TIMEOUT, DEFAULT_PATH, LEASE_SECONDS
+from .graph import NodeWrapper, create_graph
+from .research import create_initial_state
+from .state import ResearchState
+
+logger = logging.getLogger(__name__)
+
+JOBS_PER_WORKER = 4
+POLL_INTERVAL = 2.0
+HEARTBEATS_PER_LEASE = 4
+CHECKPOINTS_FILE = "checkpoints.db"
+
+# Attempts at a queue update before the lease is left to run out
+QUEUE_UPDATE_ATTEMPTS = 3
+
+# Opens a checkpointer shared by the workers, e.g. one on a database all hosts reach
+CheckpointerFactory = Callable[[], AbstractAsyncContextManager[BaseCheckpointSaver]]
+
+
+class Worker:
+    """Leases research jobs from a queue and runs up to `concurrency` of them at a
+    time on the current event loop.
+
+    A job's payload holds the keyword arguments of `create_initial_state()`;
+    clarifying questions are left unanswered unless it includes `answers`. Runs
+    are checkpointed under the job ID, so a job taken over from a crashed worker
+    resumes after its last finished node rather than starting over. The lease
+    is renewed several times per `lease_seconds` while the job runs, and the run
+    is cancelled if the lease is lost to another worker.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        checkpointer: BaseCheckpointSaver | None = None,
+        worker_id: str | None = None,
+        concurrency: int = JOBS_PER_WORKER,
+        lease_seconds: float = LEASE_SECONDS,
+        poll_interval: float = POLL_INTERVAL,
+        node_wrapper: NodeWrapper | None = None,
+    ):
+        self.queue = queue
+        self.checkpointer = checkpointer
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.graph = create_graph(node_wrapper=node_wrapper, checkpointer=checkpointer)
+
+    async def run(self, drain: bool = False) -> int:
+        """Processes jobs until cancelled, or with `drain` until no job is pending
+        or running anywhere. Returns the number of jobs this worker finished."""
+        processed = await asyncio.gather(
+            *(self._process(drain) for _ in range(self.concurrency))
+        )
+        return sum(processed)
+
+    async def run_job(self, job: Job) -> None:
+        config = {"configurable": {"thread_id": job.id}}
+        lease_lost = asyncio.Event()
+
+        run = asyncio.create_task(self._invoke(job, config))
+        heartbeat = asyncio.create_task(self._heartbeat(job, run, lease_lost))
+        try:
+            final_state = await run
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            logger.warning("Job %s lost its lease, abandoning it", job.id)
+            return
+        except Exception as e:
+            retry = await self._update(
+                job, self.queue.fail, job.id, self.worker_id, str(e)
+            )
+            logger.warning(
+                "Job %s failed on attempt %d: %s%s",
+                job.id,
+                job.attempts,
+                e,
+                "" if retry is False else ", will retry",
+            )
+            if retry is False:
+                await self._delete_checkpoint(job)
+            return
+        finally:
+            heartbeat.cancel()
+
+        done = await self._update(
+            job, self.queue.complete, job.id, self.worker_id, self._result(final_state)
+        )
+        if done:
+            logger.info("Job %s done", job.id)
+            await self._delete_checkpoint(job)
+
+    async def _process(self, drain: bool) -> int:
+        processed = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(
+                    self.queue.lease, self.worker_id, self.lease_seconds
+                )
+                counts = None
+                if job is None and drain:
+                    counts = await asyncio.to_thread(self.queue.counts)
+            except JobQueueException as e:
+                # Other workers keep running, try again after the poll interval
+                logger.warning("Failed to poll the job queue: %s", e)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if job is None:
+                if counts is not None:
+                    if not counts.get("pending") and not counts.get("running"):
+                        return processed
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            await self.run_job(job)
+            processed += 1
+
+    async def _invoke(self, job: Job, config: dict) -> ResearchState:
+        if self.checkpointer is not None:
+            snapshot = await self.graph.aget_state(config)
+            # An earlier attempt may have finished the graph but not the job
+            if snapshot.values and not snapshot.next:
+                return snapshot.values
+            if snapshot.next:
+                logger.info("Resuming job %s at %s", job.id, ", ".join(snapshot.next))
+                return await self.graph.ainvoke(None, config)
+
+        state = create_initial_state(**{"answers": [], **job.payload})
+        return await self.graph.ainvoke(state, config)
+
+    async def _heartbeat(
+        self, job: Job, run: asyncio.Task, lease_lost: asyncio.Event
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / HEARTBEATS_PER_LEASE)
+            try:
+                held = await asyncio.to_thread(
+                    self.queue.heartbeat, job.id, self.worker_id, self.lease_seconds
+                )
+            except JobQueueException as e:
+                # The lease may still be valid, try again at the next beat
+                logger.warning("Heartbeat failed for job %s: %s", job.id, e)
+                continue
+
+            if not held:
+                lease_lost.set()
+                run.cancel()
+                return
+
+    async def _update(self, job: Job, update: Callable, *args) -> bool | None:
+        """Runs a queue update for `job`, retrying while the queue fails, and
+        returns its result, or None if every attempt failed.
+
+        The checkpoint is kept in that case: the lease runs out and the job is
+        finished from it by whichever worker leases it next.
+        """
+        for attempt in range(1, QUEUE_UPDATE_ATTEMPTS + 1):
+            try:
+                return await asyncio.to_thread(update, *args)
+            except JobQueueException as e:
+                logger.warning(
+                    "Job queue update failed for job %s (attempt %d of %d): %s",
+                    job.id,
+                    attempt,
+                    QUEUE_UPDATE_ATTEMPTS,
+                    e,
+                )
+                if attempt < QUEUE_UPDATE_ATTEMPTS:
+                    await asyncio.sleep(self.poll_interval)
+        return None
+
+    async def _delete_checkpoint(self, job: Job) -> None:
+        if self.checkpointer is None:
+            return
+        # A leftover checkpoint only takes space, the job is settled either way
+        try:
+            await self.checkpointer.adelete_thread(job.id)
+        except Exception as e:
+            logger.warning("Failed to delete the checkpoint of job %s: %s", job.id, e)
+
+    def _result(self, final_state: ResearchState) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "report_filename": final_state.get("report_filename"),
+            "reports_dir": final_state.get("reports_dir", "reports"),
+            "sources": len(final_state.get("search_results", [])),
+            "llm_calls": len(final_state.get("llm_usage", [])),
+            "web_calls": sum(
+                search["web_calls"] for search in final_state.get("search_usage", [])
+            ),
+        }
+
+
+def run_worker_pool(
+    processes: int,
+    queue_path: str = DEFAULT_PATH,
+    concurrency: int = JOBS_PER_WORKER,
+    drain: bool = False,
+    checkpoints: str | CheckpointerFactory | None = None,
+) -> None:
+    """Runs `processes` worker processes on the SQLite queue at `queue_path` and
+    waits for them to exit.
+
+    Each process has its own interpreter, so the CPU-bound parts of concurrent
+    runs (prompt building, JSON parsing, PDF rendering) are not serialized by
+    one GIL. More workers on this host can join by running this against the
+    same queue.
+
+    Runs are checkpointed to `checkpoints`, a SQLite path, a Postgres
+    connection string (with `langgraph-checkpoint-postgres` installed) or a
+    picklable function returning an async context manager that yields a
+    checkpointer. It defaults to `checkpoints.db` next to the queue, which only
+    workers on this host can resume from; workers spread over hosts need a
+    checkpointer they all reach.
+    """
+    if checkpoints is None:
+        checkpoints = os.path.join(os.path.dirname(queue_path), CHECKPOINTS_FILE)
+
+    # Worker processes start from a fresh interpreter, the parent may have threads
+    context = multiprocessing.get_context("spawn")
+    log_level = logging.getLogger("core").getEffectiveLevel()
+    workers = [
+        context.Process(
+            target=_worker_process,
+            args=(queue_path, checkpoints, concurrency, drain, log_level),
+            name=f"research-worker-{i}",
+        )
+        for i in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+@asynccontextmanager
+async def open_checkpointer(
+    checkpoints: str | CheckpointerFactory,
+) -> AsyncIterator[BaseCheckpointSaver]:
+    """Opens the checkpointer described by `checkpoints`, as in
+    `run_worker_pool()`."""
+    if callable(checkpoints):
+        async with checkpoints() as checkpointer:
+            yield checkpointer
+        return
+
+    if checkpoints.startswith(("postgres://", "postgresql://")):
+        try:
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        except ImportError as e:
+            raise JobQueueException(
+                "Postgres checkpoints require langgraph-checkpoint-postgres"
+            ) from e
+
+        async with AsyncPostgresSaver.from_conn_string(checkpoints) as checkpointer:
+            await checkpointer.setup()
+            yield checkpointer
+        return
+
+    if os.path.dirname(checkpoints):
+        os.makedirs(os.path.dirname(checkpoints), exist_ok=True)
+    async with aiosqlite.connect(checkpoints, timeout=BUSY_TIMEOUT) as conn:
+        yield AsyncSqliteSaver(conn)
+
+
+def _worker_process(
+    queue_path: str,
+    checkpoints: str | CheckpointerFactory,
+    concurrency: int,
+    drain: bool,
+    log_level: int,
+) -> None:
+    # Progress is logged at the level the parent process logs at
+    logging.basicConfig(format="%(processName)s: %(message)s")
+    logging.getLogger("core").setLevel(log_level)
+
+    try:
+        asyncio.run(_serve(queue_path, checkpoints, concurrency, drain))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(
+    queue_path: str,
+    checkpoints: str | CheckpointerFactory,
+    concurrency: int,
+    drain: bool,
+) -> None:
+    queue = SQLiteJobQueue(queue_path)
+
+    try:
+        async with open_checkpointer(checkpoints) as checkpointer:
+            worker = Worker(queue, checkpointer, concurrency=concurrency)
+            logger.info("Worker %s started", worker.worker_id)
+            processed = await worker.run(drain=drain)
+            logger.info("Worker %s finished %d jobs", worker.worker_id, processed)
+    finally:
+        queue.close()
@@ -16,3 +16,15 @@ class NodeException(Exception):
 
 class FileOperationException(Exception):
     pass
+
+
+class MCPServiceException(Exception):
+    pass
+
+
+class KnowledgeBaseException(Exception):
+    pass
+
+
+class JobQueueException(Exception):
+    pass
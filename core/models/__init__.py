@@ -1,9 +1,21 @@
 """Pydantic models for structured outputs."""
 
-from .models import ClarifyingQuestions, DecisionOutput, SearchQueries
+from .models import (
+    ClarifyingQuestions,
+    DecisionOutput,
+    OutlineSection,
+    ReportOutline,
+    ResearchPlan,
+    SearchQueries,
+    Subtopic,
+)
 
 __all__ = [
     "ClarifyingQuestions",
     "SearchQueries",
     "DecisionOutput",
+    "ResearchPlan",
+    "Subtopic",
+    "ReportOutline",
+    "OutlineSection",
 ]
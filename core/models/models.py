@@ -29,3 +29,32 @@ class DecisionOutput(BaseModel):
         description="Follow-up queries to address gaps",
         default_factory=list,
     )
+
+
+class Subtopic(BaseModel):
+    name: str = Field(description="Short name of the subtopic")
+    brief: str = Field(description="Self-contained research brief for the subtopic")
+
+
+class ResearchPlan(BaseModel):
+    subtopics: list[Subtopic] = Field(
+        description="Independent subtopics that can be researched in parallel",
+        default_factory=list,
+    )
+
+
+class OutlineSection(BaseModel):
+    heading: str = Field(description="Heading of the section")
+    description: str = Field(description="What the section must cover")
+    source_ids: list[str] = Field(
+        description="IDs of the sources the section draws on",
+        default_factory=list,
+    )
+
+
+class ReportOutline(BaseModel):
+    title: str = Field(description="Title of the report")
+    sections: list[OutlineSection] = Field(
+        description="Sections that can be written independently, in reading order",
+        min_length=1,
+    )
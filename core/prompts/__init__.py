@@ -1,37 +1,63 @@
 """Prompts for the deep research agent."""
 
+from .assembly import prompt_cache_key
 from .system_prompts import (
     CLARIFY_SYSTEM_PROMPT,
     COMPRESSION_SYSTEM_PROMPT,
     DECIDE_SYSTEM_PROMPT,
+    DECOMPOSE_SYSTEM_PROMPT,
     FILENAME_GENERATION_SYSTEM_PROMPT,
     GENERATE_QUERIES_SYSTEM_PROMPT,
     GENERATE_REPORT_SYSTEM_PROMPT,
+    REFRESH_FINDINGS_SYSTEM_PROMPT,
+    REPORT_OUTLINE_SYSTEM_PROMPT,
+    REPORT_SECTION_SYSTEM_PROMPT,
     RESEARCH_BRIEF_SYSTEM_PROMPT,
+    RESEARCH_SYSTEM_PROMPT,
+    SECTION_UPDATE_SYSTEM_PROMPT,
 )
 from .user_prompts import (
     build_clarify_user_prompt,
     build_compression_user_prompt,
+    build_decompose_user_prompt,
     build_filename_user_prompt,
     build_generate_queries_user_prompt,
     build_reflection_user_prompt,
+    build_refresh_findings_user_prompt,
+    build_refresh_queries_user_prompt,
+    build_report_outline_user_prompt,
+    build_report_section_user_prompt,
     build_report_user_prompt,
     build_research_brief_user_prompt,
+    build_section_update_user_prompt,
 )
 
 __all__ = [
+    "RESEARCH_SYSTEM_PROMPT",
     "CLARIFY_SYSTEM_PROMPT",
     "RESEARCH_BRIEF_SYSTEM_PROMPT",
+    "DECOMPOSE_SYSTEM_PROMPT",
     "GENERATE_QUERIES_SYSTEM_PROMPT",
     "COMPRESSION_SYSTEM_PROMPT",
     "DECIDE_SYSTEM_PROMPT",
     "GENERATE_REPORT_SYSTEM_PROMPT",
+    "REPORT_OUTLINE_SYSTEM_PROMPT",
+    "REPORT_SECTION_SYSTEM_PROMPT",
+    "REFRESH_FINDINGS_SYSTEM_PROMPT",
+    "SECTION_UPDATE_SYSTEM_PROMPT",
     "FILENAME_GENERATION_SYSTEM_PROMPT",
     "build_clarify_user_prompt",
     "build_research_brief_user_prompt",
+    "build_decompose_user_prompt",
     "build_generate_queries_user_prompt",
     "build_compression_user_prompt",
     "build_reflection_user_prompt",
     "build_report_user_prompt",
+    "build_report_outline_user_prompt",
+    "build_report_section_user_prompt",
+    "build_refresh_queries_user_prompt",
+    "build_refresh_findings_user_prompt",
+    "build_section_update_user_prompt",
     "build_filename_user_prompt",
+    "prompt_cache_key",
 ]
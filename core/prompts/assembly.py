@@ -0,0 +1,76 @@
+import hashlib
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+
+from ..utils.text_utils import EXCERPT_MAX_CHARS
+
+
+class Stability(IntEnum):
+    # Lower values come first so calls in a run share the longest possible prefix
+    RUN = 0
+    GROWING = 1
+    ITERATION = 2
+    CALL = 3
+
+
+@dataclass(frozen=True)
+class PromptSegment:
+    text: str
+    stability: Stability
+
+
+def assemble_prompt(*segments: PromptSegment) -> str:
+    # sorted() is stable, so segments of equal stability keep the given order
+    ordered = sorted(
+        (segment for segment in segments if segment.text),
+        key=lambda segment: segment.stability,
+    )
+    return "\n\n".join(segment.text for segment in ordered)
+
+
+@lru_cache(maxsize=32)
+def brief_segment(research_brief: str) -> PromptSegment:
+    return PromptSegment(f"Research Brief:\n{research_brief}", Stability.RUN)
+
+
+def sources_segment(
+    search_results: list[dict], stability: Stability = Stability.GROWING
+) -> PromptSegment:
+    # Sources are append-only, so earlier entries render identically every call
+    rendered = [
+        _render_source(
+            result.get("source_id", f"S{i}"),
+            result.get("query", "N/A"),
+            _source_excerpt(result),
+        )
+        for i, result in enumerate(search_results, 1)
+    ]
+    return PromptSegment("Sources:\n\n" + "\n\n".join(rendered), stability)
+
+
+def findings_segment(compressed_findings: str | None) -> PromptSegment:
+    return PromptSegment(
+        f"Current Findings Summary:\n{compressed_findings or 'None yet.'}",
+        Stability.ITERATION,
+    )
+
+
+def call_segment(text: str) -> PromptSegment:
+    return PromptSegment(text, Stability.CALL)
+
+
+def prompt_cache_key(research_brief: str | None) -> str | None:
+    if not research_brief:
+        return None
+    return hashlib.sha256(research_brief.encode("utf-8")).hexdigest()[:32]
+
+
+@lru_cache(maxsize=4096)
+def _render_source(source_id: str, query: str, excerpt: str) -> str:
+    return f"[{source_id}] (query: {query})\n{excerpt}"
+
+
+def _source_excerpt(result: dict) -> str:
+    # Excerpts are selected at ingest, fall back to the leading text otherwise
+    return result.get("excerpt") or (result.get("text") or "N/A")[:EXCERPT_MAX_CHARS]
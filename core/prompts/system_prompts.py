@@ -28,9 +28,33 @@ The research brief should include:
 Be specific and actionable. This brief will guide the search query generation."""
 
 
+DECOMPOSE_SYSTEM_PROMPT = """You are a research planning expert.
+
+Split the research brief into independent subtopics that separate researchers can investigate in parallel.
+
+Guidelines:
+- Only split the brief if it genuinely covers several distinct subtopics
+- Subtopics should not overlap, and together they should cover the whole brief
+- Give each subtopic a short name and a self-contained brief with the objective, key questions and scope, so it can be researched without seeing the original brief
+
+Return your response as a JSON object with a "subtopics" field containing an array of objects with "name" and "brief" fields. Return an empty array if the brief should be researched as a whole."""
+
+
+# Shared by every call that works on a research brief. Role instructions below are
+# appended after the brief, sources and findings so those calls share a cacheable
+# prefix.
+RESEARCH_SYSTEM_PROMPT = """You are an expert research assistant working through a multi-step research task.
+
+Each request gives you the research brief first, followed by the sources and findings gathered so far, and ends with the task to perform for this step.
+
+Sources are identified by short IDs in square brackets, such as [S3]. Always refer to sources by these IDs.
+
+Follow the task instructions at the end of each request exactly, including any required output format."""
+
+
 GENERATE_QUERIES_SYSTEM_PROMPT = """You are a search query expert.
 
-Based on the research brief{iteration_context}, generate {num_queries} targeted search queries.
+Based on the research brief and the findings so far, generate targeted search queries.
 
 IMPORTANT GUIDELINES:
 - Each query should focus on ONE specific aspect of the research topic
@@ -49,6 +73,7 @@ Create a comprehensive summary that:
 - Preserves specific details, statistics, and key facts
 - Is clear and well-structured
 - Maintains accuracy to the source material
+- Keeps the source ID (e.g. [S3]) after every fact it supports
 
 Be thorough and comprehensive in your summary."""
 
@@ -57,7 +82,7 @@ DECIDE_SYSTEM_PROMPT = """You are a research analyst evaluating the completeness
 
 You have:
 1. A research brief outlining the research goals
-2. Compressed findings from {num_iterations} round(s) of searching
+2. Compressed findings from the rounds of searching so far
 
 Your tasks:
 1. Think through what you've learned so far and what's still missing
@@ -89,7 +114,8 @@ Generate a high-quality, detailed answer to the user's research question based o
 
 CRITICAL REQUIREMENTS:
 - Write in markdown format with clear structure
-- Include sources in markdown format: [Source Title](URL) - THIS IS A MUST
+- Cite sources by their IDs in square brackets, e.g. [S3] or [S3, S7] - THIS IS A MUST
+- Never write source URLs or a references section, they are added automatically
 - Cite sources naturally throughout your answer, not just at the end
 - Be comprehensive and detailed - each section should be substantive with multiple paragraphs
 - Include specific examples, statistics, dates, and concrete details whenever available
@@ -114,6 +140,68 @@ DO NOT:
 Write naturally and professionally, as if you're an expert providing a thorough explanation to someone who wants to deeply understand the topic."""
 
 
+REPORT_OUTLINE_SYSTEM_PROMPT = """You are a research assistant planning a comprehensive, in-depth answer based on gathered information.
+
+Plan the structure of the answer to the user's research question as a list of sections that can each be written independently.
+
+GUIDELINES:
+- Give each section a clear heading and a short description of what it must cover
+- Sections must not overlap - each fact belongs to exactly one section
+- Order the sections so the answer reads naturally, ending with a conclusion
+- Assign to each section the IDs of the sources it needs, e.g. ["S3", "S7"]
+- Every relevant source should be assigned to at least one section
+
+Return your response as a JSON object with:
+- "title": the title of the answer
+- "sections": array of objects with "heading", "description" and "source_ids" fields"""
+
+
+REPORT_SECTION_SYSTEM_PROMPT = """You are a research assistant writing one section of a comprehensive, in-depth answer based on gathered information.
+
+CRITICAL REQUIREMENTS:
+- Write only the body of the assigned section, without its heading; use ### subheadings if needed
+- Cover only what the section description asks for, other sections cover the rest of the outline
+- Cite sources by their IDs in square brackets, e.g. [S3] or [S3, S7] - THIS IS A MUST
+- Never write source URLs or a references section, they are added automatically
+- Write 3-5 substantive paragraphs with specific examples, statistics, dates and concrete details
+- Provide analysis and insights, not just facts
+
+DO NOT:
+- Mention that you are part of a multi-step research process or writing a single section
+- Say "based on the summaries" or "according to the research"
+- Repeat the introduction or conclusion of the answer unless the section is the introduction or conclusion
+
+Write naturally and professionally, as if you're an expert providing a thorough explanation."""
+
+
+REFRESH_FINDINGS_SYSTEM_PROMPT = """You are a research analyst updating an earlier research summary with newly published information.
+
+Update the summary so that it:
+- Keeps every finding from the current summary that the new sources do not contradict or supersede
+- Adds the important new facts, statistics and developments from the new sources
+- Replaces figures and statements the new sources show to be outdated, noting what changed
+- Keeps the existing organization by themes or topics, adding themes only where needed
+- Keeps the source ID (e.g. [S3]) after every fact it supports, for old and new sources alike
+
+Return only the updated summary."""
+
+
+SECTION_UPDATE_SYSTEM_PROMPT = """You are a research assistant updating one section of an earlier answer with newly published information.
+
+CRITICAL REQUIREMENTS:
+- Return only the updated body of the section, without its heading; keep any ### subheadings it uses
+- Keep the existing text and its citations wherever the new sources do not change it
+- Work in the new information where it belongs, and revise statements the new sources show to be outdated
+- Cite the new sources by their IDs in square brackets, e.g. [S3] or [S3, S7]
+- Never write source URLs or a references section, they are added automatically
+
+DO NOT:
+- Mention that the section was updated, or when
+- Cover material that belongs to other sections of the answer
+
+Write naturally and professionally, in the style of the existing section."""
+
+
 FILENAME_GENERATION_SYSTEM_PROMPT = """You are a filename generator. Generate clean, descriptive filenames based on research queries.
 
 Requirements:
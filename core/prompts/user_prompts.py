@@ -1,5 +1,25 @@
 from langchain_core.messages import BaseMessage
 
+from .assembly import (
+    PromptSegment,
+    Stability,
+    assemble_prompt,
+    brief_segment,
+    call_segment,
+    findings_segment,
+    sources_segment,
+)
+from .system_prompts import (
+    COMPRESSION_SYSTEM_PROMPT,
+    DECIDE_SYSTEM_PROMPT,
+    GENERATE_QUERIES_SYSTEM_PROMPT,
+    GENERATE_REPORT_SYSTEM_PROMPT,
+    REFRESH_FINDINGS_SYSTEM_PROMPT,
+    REPORT_OUTLINE_SYSTEM_PROMPT,
+    REPORT_SECTION_SYSTEM_PROMPT,
+    SECTION_UPDATE_SYSTEM_PROMPT,
+)
+
 
 def build_clarify_user_prompt(original_query: str) -> str:
     return (
@@ -28,6 +48,13 @@ Create a research brief that clearly outlines:
 4. Any specific angles or perspectives to focus on"""
 
 
+def build_decompose_user_prompt(research_brief: str, max_subtopics: int) -> str:
+    return f"""Research Brief:
+{research_brief}
+
+Split this research brief into at most {max_subtopics} independent subtopics, or return none if it should be researched as a whole."""
+
+
 def build_generate_queries_user_prompt(
     research_brief: str,
     search_iteration: int,
@@ -36,34 +63,60 @@ def build_generate_queries_user_prompt(
     knowledge_gaps: list[str] | None = None,
 ) -> str:
     if search_iteration == 0:
-        return f"""Research Brief:
-{research_brief}
+        return assemble_prompt(
+            brief_segment(research_brief),
+            call_segment(f"""Task:
+{GENERATE_QUERIES_SYSTEM_PROMPT}
 
-Generate {num_queries} diverse, targeted search queries to gather comprehensive information for this research.
+This is search iteration 1. Generate {num_queries} diverse, targeted search queries to gather comprehensive information for this research.
 
 Remember:
 - Each query should focus on ONE specific aspect
 - Avoid generating similar queries
-- Make queries self-contained with necessary context"""
-    else:
-        gaps_text = "\n".join(f"- {gap}" for gap in (knowledge_gaps or []))
+- Make queries self-contained with necessary context"""),
+        )
 
-        return f"""Research Brief:
-{research_brief}
+    gaps_text = "\n".join(f"- {gap}" for gap in (knowledge_gaps or []))
 
-Current Findings Summary:
-{compressed_findings}
-
-Knowledge Gaps:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        call_segment(f"""Knowledge Gaps:
 {gaps_text}
 
-Generate up to {num_queries} follow-up search queries ONLY if needed to address critical knowledge gaps.
+Task:
+{GENERATE_QUERIES_SYSTEM_PROMPT}
+
+This is search iteration {search_iteration + 1}. Generate up to {num_queries} follow-up search queries ONLY if needed to address critical knowledge gaps.
 
 Remember:
 - Each query should address ONE specific gap
 - Don't generate similar queries
 - Make queries self-contained with necessary context
-- If the current findings are sufficient, generate fewer queries or none"""
+- If the current findings are sufficient, generate fewer queries or none"""),
+    )
+
+
+def build_refresh_queries_user_prompt(
+    research_brief: str,
+    compressed_findings: str,
+    published_after: str,
+    num_queries: int,
+) -> str:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        call_segment(f"""Task:
+{GENERATE_QUERIES_SYSTEM_PROMPT}
+
+The findings above were gathered on {published_after[:10]}. Generate up to {num_queries} search queries for developments since then that would change or extend them.
+
+Remember:
+- Focus on what is likely to have changed: new releases, figures, studies, decisions and events
+- Each query should focus on ONE specific aspect
+- Don't generate similar queries
+- Make queries self-contained with necessary context"""),
+    )
 
 
 def build_compression_user_prompt(
@@ -71,42 +124,50 @@ def build_compression_user_prompt(
     search_results: list[dict],
     search_iteration: int,
 ) -> str:
-    results_text = []
-    for i, result in enumerate(search_results, 1):
-        result_info = f"""
-Result {i}:
-- Query: {result.get("query", "N/A")}
-- Title: {result.get("title", "N/A")}
-- URL: {result.get("url", "N/A")}
-- Content: {result.get("text", "N/A")[:500]}...
-"""
-        results_text.append(result_info)
-
-    results_summary = "\n".join(results_text)
-
-    return f"""Research Brief:
-{research_brief}
-
-Search Results from {search_iteration} iteration(s):
-{results_summary}
+    return assemble_prompt(
+        brief_segment(research_brief),
+        sources_segment(search_results),
+        call_segment(f"""Task:
+{COMPRESSION_SYSTEM_PROMPT}
 
-Total results collected: {len(search_results)}
+The sources above were collected over {search_iteration} iteration(s), {len(search_results)} results in total.
 
 Create a comprehensive, well-organized summary of all the findings from these search results.
 Include all important information, key facts, statistics, and insights.
-Organize the information logically by themes or topics."""
+Organize the information logically by themes or topics.
+Keep the source ID (e.g. [S3]) after every fact it supports."""),
+    )
+
+
+def build_refresh_findings_user_prompt(
+    research_brief: str,
+    compressed_findings: str,
+    new_sources: list[dict],
+) -> str:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        sources_segment(new_sources, Stability.CALL),
+        call_segment(f"""Task:
+{REFRESH_FINDINGS_SYSTEM_PROMPT}
+
+The {len(new_sources)} sources above were published after the current findings summary was written. Update the summary with them."""),
+    )
 
 
 def build_reflection_user_prompt(
     research_brief: str,
     compressed_findings: str,
     search_iteration: int,
+    max_iterations: int = 5,
 ) -> str:
-    return f"""Research Brief:
-{research_brief}
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        call_segment(f"""Task:
+{DECIDE_SYSTEM_PROMPT}
 
-Compressed Findings from {search_iteration} iteration(s):
-{compressed_findings}
+The findings above are from {search_iteration} iteration(s) of searching.
 
 Analyze these compressed findings and:
 1. Think through what you've learned and whether it's sufficient to answer the user's question
@@ -119,7 +180,8 @@ Remember:
 - Each follow-up query should focus on ONE specific knowledge gap
 - Don't generate similar queries
 - Make queries self-contained with necessary context for web search
-- We're on iteration {search_iteration} of max 5, so be judicious about continuing"""
+- We're on iteration {search_iteration} of max {max_iterations}, so be judicious about continuing"""),
+    )
 
 
 def build_report_user_prompt(
@@ -128,39 +190,23 @@ def build_report_user_prompt(
     compressed_findings: str,
     search_results: list[dict],
 ) -> str:
-    sources_text = []
-    for i, result in enumerate(search_results, 1):
-        title = result.get("title", "Untitled")
-        url = result.get("url", "N/A")
-        content = result.get("text", "N/A")[:500]
-
-        source_entry = f"""Source {i}:
-Title: {title}
-URL: {url}
-Content: {content}...
-"""
-        sources_text.append(source_entry)
-
-    sources_summary = "\n".join(sources_text)
-
-    return f"""Generate a high-quality answer to the user's question based on the provided summaries.
-
-User's Research Question:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        sources_segment(search_results),
+        findings_segment(compressed_findings),
+        call_segment(f"""User's Research Question:
 {original_query}
 
-Research Context:
-{research_brief}
+Task:
+{GENERATE_REPORT_SYSTEM_PROMPT}
 
-Summaries from {len(search_results)} sources:
-{compressed_findings}
-
-Available Sources (MUST be cited in markdown format):
-{sources_summary}
+Generate a high-quality answer to the user's question based on the findings summary and the {len(search_results)} sources above.
 
 CRITICAL INSTRUCTIONS:
 - Answer the user's question comprehensively and in-depth using the summaries and sources
 - Use markdown formatting for structure (headings, lists, bold, etc.)
-- Cite sources naturally throughout using markdown: [Source Title](URL)
+- Cite sources naturally throughout using their IDs in square brackets: [S3] or [S3, S7]
+- Never write URLs or a references section, they are added automatically
 - Every claim should be backed by a source citation
 - Organize information logically - use whatever structure makes sense for this topic
 - Be thorough and detailed - each major section should be 3-5 paragraphs with specific examples
@@ -175,7 +221,81 @@ DEPTH REQUIREMENTS:
 - Expand on important points with multiple supporting details
 - Provide nuanced analysis that demonstrates deep understanding
 
-DO NOT mention that you are the final step of a research process. Write naturally as if you're an expert providing a comprehensive, detailed explanation."""
+DO NOT mention that you are the final step of a research process. Write naturally as if you're an expert providing a comprehensive, detailed explanation."""),
+    )
+
+
+def build_report_outline_user_prompt(
+    original_query: str,
+    research_brief: str,
+    compressed_findings: str,
+    search_results: list[dict],
+    max_sections: int,
+) -> str:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        sources_segment(search_results),
+        findings_segment(compressed_findings),
+        call_segment(f"""User's Research Question:
+{original_query}
+
+Task:
+{REPORT_OUTLINE_SYSTEM_PROMPT}
+
+Plan an answer to the user's question based on the findings summary and the {len(search_results)} sources above, in at most {max_sections} sections."""),
+    )
+
+
+def build_report_section_user_prompt(
+    original_query: str,
+    research_brief: str,
+    compressed_findings: str,
+    outline: str,
+    heading: str,
+    description: str,
+    section_sources: list[dict],
+) -> str:
+    # Sections share everything up to the outline; their sources vary per call
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        PromptSegment(f"Answer Outline:\n{outline}", Stability.ITERATION),
+        sources_segment(section_sources, Stability.CALL),
+        call_segment(f"""User's Research Question:
+{original_query}
+
+Task:
+{REPORT_SECTION_SYSTEM_PROMPT}
+
+Write the section "{heading}" of the outline above: {description}
+
+Base the section on the findings summary and the {len(section_sources)} sources listed for it."""),
+    )
+
+
+def build_section_update_user_prompt(
+    original_query: str,
+    research_brief: str,
+    compressed_findings: str,
+    heading: str,
+    section: str,
+    new_sources: list[dict],
+) -> str:
+    return assemble_prompt(
+        brief_segment(research_brief),
+        findings_segment(compressed_findings),
+        sources_segment(new_sources, Stability.CALL),
+        call_segment(f"""User's Research Question:
+{original_query}
+
+Current Section "{heading}":
+{section}
+
+Task:
+{SECTION_UPDATE_SYSTEM_PROMPT}
+
+Update the section "{heading}" above with the {len(new_sources)} new sources listed, using the updated findings summary for context."""),
+    )
 
 
 def build_filename_user_prompt(original_query: str) -> str:
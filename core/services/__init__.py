@@ -1,6 +1,25 @@
 """Service package for external API clients."""
 
 from .exa_client import ExaClient
+from .hedging import Hedger, get_hedger
+from .job_queue import Job, JobQueue, SQLiteJobQueue
+from .mcp_client import MCPClient, get_mcp_client
+from .openai_batch import OpenAIBatchClient
 from .openai_client import OpenAIClient
+from .search_fanout import SearchFanout, SearchOutcome, get_search_fanout
 
-__all__ = ["OpenAIClient", "ExaClient"]
+__all__ = [
+    "OpenAIClient",
+    "OpenAIBatchClient",
+    "ExaClient",
+    "Hedger",
+    "Job",
+    "JobQueue",
+    "SQLiteJobQueue",
+    "MCPClient",
+    "SearchFanout",
+    "SearchOutcome",
+    "get_hedger",
+    "get_mcp_client",
+    "get_search_fanout",
+]
@@ -1,8 +1,10 @@
 import os
+from functools import partial
 
 from exa_py import Exa
 
 from ..exceptions import APIKeyException, SearchServiceException
+from .hedging import get_hedger
 
 
 class ExaClient:
@@ -13,7 +15,11 @@ class ExaClient:
                 "Exa API key must be set in EXA_API_KEY environment variable"
             )
 
-        self.client = Exa(api_key=self.api_key)
+        # EXA_BASE_URL points the client at a proxy or a local stub server
+        self.client = Exa(
+            api_key=self.api_key,
+            base_url=os.getenv("EXA_BASE_URL", "https://api.exa.ai"),
+        )
 
     def call(
         self,
@@ -21,6 +27,7 @@ class ExaClient:
         num_results: int = 5,
         text: bool | dict[str, int] = True,
         highlights: bool | dict[str, int] = False,
+        start_published_date: str | None = None,
     ) -> list[dict]:
         try:
             search_params = {
@@ -36,7 +43,15 @@ class ExaClient:
             if highlights:
                 search_params["highlights"] = highlights
 
-            results = self.client.search_and_contents(**search_params)
+            if start_published_date:
+                search_params["start_published_date"] = start_published_date
+
+            request = partial(self.client.search_and_contents, **search_params)
+            hedger = get_hedger()
+            if hedger:
+                results, _ = hedger.run("search", request)
+            else:
+                results = request()
 
             formatted_results = []
             for result in results.results:
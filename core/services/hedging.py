@@ -0,0 +1,258 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+T = TypeVar("T")
+
+HEDGE_PERCENTILE = 95.0
+MAX_HEDGE_FRACTION = 0.05
+MIN_SAMPLES = 20
+WINDOW = 500
+MAX_CONCURRENT_SYNC_CALLS = 32
+
+_END = object()
+
+
+class LatencyHistogram:
+    """Rolling window of the most recent latencies of one kind of request."""
+
+    def __init__(self, window: int = WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class Hedger:
+    """Sends a duplicate of a request that is slower than usual and keeps
+    whichever copy answers first.
+
+    Latencies are tracked per label (the node making the call). Once a label has
+    enough samples, a request still running after the label's `percentile`
+    latency gets a second copy. Hedges are capped at `max_hedge_fraction` of all
+    requests, so at most that share of extra spend is added.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        max_hedge_fraction: float = MAX_HEDGE_FRACTION,
+        min_samples: int = MIN_SAMPLES,
+        window: int = WINDOW,
+    ):
+        self.percentile = percentile
+        self.max_hedge_fraction = max_hedge_fraction
+        self.min_samples = min_samples
+        self._histograms: dict[str, LatencyHistogram] = defaultdict(
+            lambda: LatencyHistogram(window)
+        )
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+            }
+
+    def hedge_delay(self, label: str) -> float | None:
+        with self._lock:
+            histogram = self._histograms[label]
+            if len(histogram) < self.min_samples:
+                return None
+            return histogram.percentile(self.percentile)
+
+    async def arun(
+        self, label: str, request: Callable[[], Awaitable[T]]
+    ) -> tuple[T, bool]:
+        """Awaits `request()`, hedging it if it is slow. Returns the result and
+        whether a hedge was sent. The losing copy is cancelled."""
+        winner, hedged = await self._arace(label, request)
+        return winner.result(), hedged
+
+    def run(self, label: str, request: Callable[[], T]) -> tuple[T, bool]:
+        """Blocking version of `arun` for synchronous clients. Both copies run on
+        a thread pool; a losing copy that has already started cannot be
+        interrupted, so its result is discarded when it finishes."""
+        delay = self._start(label)
+        started = time.perf_counter()
+        if delay is None:
+            result = request()
+            self._finish(label, started, won=False)
+            return result, False
+
+        primary = self._pool().submit(request)
+        hedge = None
+        done, pending = wait({primary}, timeout=delay)
+        if pending and self._take_hedge():
+            hedge = self._pool().submit(request)
+            pending.add(hedge)
+
+        while True:
+            winner = _first_success(done, primary)
+            if winner is not None or not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+        for future in pending:
+            future.cancel()
+        if winner is None:
+            return primary.result(), hedge is not None
+
+        self._finish(label, started, won=winner is hedge)
+        return winner.result(), hedge is not None
+
+    async def astream(
+        self, label: str, request: Callable[[], Awaitable[AsyncIterator[T]]]
+    ) -> AsyncIterator[T]:
+        """Streams from `await request()`, hedging on the time to the first
+        item. Once one copy has produced an item the other is closed."""
+
+        async def first_item():
+            stream = await request()
+            try:
+                items = aiter(stream)
+                return stream, items, await anext(items, _END)
+            except BaseException:
+                await _aclose(stream)
+                raise
+
+        async def discard(result):
+            await _aclose(result[0])
+
+        winner, _ = await self._arace(label, first_item, discard)
+        stream, items, item = winner.result()
+        try:
+            if item is _END:
+                return
+            yield item
+            async for item in items:
+                yield item
+        finally:
+            await _aclose(stream)
+
+    async def _arace(
+        self,
+        label: str,
+        start: Callable[[], Awaitable[T]],
+        discard: Callable[[T], Awaitable[None]] | None = None,
+    ) -> tuple[asyncio.Future, bool]:
+        """Runs `start()`, and a second copy of it once the first outlives the
+        hedge delay. Returns the first copy to succeed, or the primary when both
+        fail, along with whether a hedge was sent."""
+        delay = self._start(label)
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(start())
+        hedge = None
+        pending = {primary}
+        winner = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if pending and self._take_hedge():
+                hedge = asyncio.ensure_future(start())
+                pending.add(hedge)
+
+            while True:
+                winner = _first_success(done, primary)
+                if winner is not None or not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            return primary, hedge is not None
+
+        # A loser that finished in the same wakeup may hold an open stream
+        loser = primary if winner is hedge else hedge
+        if discard and loser and loser.done() and _first_success({loser}, loser):
+            await discard(loser.result())
+
+        self._finish(label, started, won=winner is hedge)
+        return winner, hedge is not None
+
+    def _start(self, label: str) -> float | None:
+        delay = self.hedge_delay(label)
+        with self._lock:
+            self._requests += 1
+        return delay
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.max_hedge_fraction * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+    def _finish(self, label: str, started: float, won: bool) -> None:
+        with self._lock:
+            self._histograms[label].add(time.perf_counter() - started)
+            if won:
+                self._hedge_wins += 1
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    MAX_CONCURRENT_SYNC_CALLS, thread_name_prefix="hedge"
+                )
+            return self._executor
+
+
+def _first_success(done: set, primary):
+    succeeded = [
+        task for task in done if not task.cancelled() and task.exception() is None
+    ]
+    # Prefer the primary when both copies finished in the same wakeup
+    if primary in succeeded:
+        return primary
+    return succeeded[0] if succeeded else None
+
+
+async def _aclose(stream) -> None:
+    if hasattr(stream, "aclose"):
+        await stream.aclose()
+    elif hasattr(stream, "close"):
+        await stream.close()
+
+
+_hedger: Hedger | None = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger | None:
+    global _hedger
+
+    if os.getenv("HEDGE_REQUESTS", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger(
+                percentile=float(os.getenv("HEDGE_PERCENTILE", HEDGE_PERCENTILE)),
+                max_hedge_fraction=float(
+                    os.getenv("HEDGE_MAX_FRACTION", MAX_HEDGE_FRACTION)
+                ),
+            )
+        return _hedger
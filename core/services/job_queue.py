@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from ..exceptions import JobQueueException
+
+DEFAULT_PATH = ".jobs/queue.db"
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+
+# Seconds a connection waits for another process's write to finish
+BUSY_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, enqueued_at);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    payload: dict
+    status: str
+    attempts: int
+    worker_id: str | None = None
+    result: dict | None = None
+    error: str | None = None
+
+
+class JobQueue(ABC):
+    """Durable queue of research jobs shared by workers on one or more hosts.
+
+    A worker leases a job for a limited time and renews the lease with heartbeats
+    while it runs. If the worker crashes or hangs, the lease runs out and another
+    worker leases the job again, until it has been attempted `max_attempts`
+    times. Jobs go from `pending` to `running` and end as `done` or `failed`.
+    Updates from a worker that no longer holds the lease are ignored.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: dict, job_id: str | None = None) -> str:
+        """Adds a job and returns its ID."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Job | None:
+        """Leases the oldest pending or abandoned job, or returns None."""
+
+    @abstractmethod
+    def heartbeat(
+        self, job_id: str, worker_id: str, lease_seconds: float = LEASE_SECONDS
+    ) -> bool:
+        """Extends the lease, returning False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """Marks the job done, returning False if the worker no longer holds it."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Returns the job to the queue, or marks it failed once it has used its
+        attempts. Returns whether it will be retried."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Job | None:
+        pass
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """Number of jobs in each status."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """JobQueue in a SQLite database, shared by every process that opens it.
+
+    Processes on other hosts can share it only through a filesystem with working
+    locks; use another backend there.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(
+                path, timeout=BUSY_TIMEOUT, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        except Exception as e:
+            raise JobQueueException(f"Failed to open job queue: {str(e)}") from e
+
+    def enqueue(self, payload: dict, job_id: str | None = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        self._write(
+            "INSERT INTO jobs (id, payload, status, enqueued_at) "
+            "VALUES (?, ?, 'pending', ?)",
+            (job_id, json.dumps(payload), time.time()),
+        )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Job | None:
+        now = time.time()
+
+        with self._lock:
+            try:
+                with self._conn:
+                    # Abandoned jobs that have used their attempts are given up
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, "
+                        "error = 'lease expired after the last attempt' "
+                        "WHERE status = 'running' AND lease_expires < ? "
+                        "AND attempts >= ?",
+                        (now, now, self.max_attempts),
+                    )
+                    # One statement, so no other process can lease the same job
+                    rows = self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker_id = ?, "
+                        "lease_expires = ?, attempts = attempts + 1, "
+                        "started_at = COALESCE(started_at, ?) "
+                        "WHERE id = (SELECT id FROM jobs WHERE status = 'pending' "
+                        "OR (status = 'running' AND lease_expires < ?) "
+                        "ORDER BY enqueued_at LIMIT 1) "
+                        "RETURNING id, payload, status, attempts, worker_id",
+                        (worker_id, now + lease_seconds, now, now),
+                    ).fetchall()
+            except Exception as e:
+                raise JobQueueException(f"Failed to lease job: {str(e)}") from e
+
+        if not rows:
+            return None
+        row = rows[0]
+        return Job(row[0], json.loads(row[1]), row[2], row[3], row[4])
+
+    def heartbeat(
+        self, job_id: str, worker_id: str, lease_seconds: float = LEASE_SECONDS
+    ) -> bool:
+        return self._write(
+            "UPDATE jobs SET lease_expires = ? "
+            "WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker_id),
+        )
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return self._write(
+            "UPDATE jobs SET status = 'done', finished_at = ?, result = ?, "
+            "error = NULL WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (time.time(), json.dumps(result), job_id, worker_id),
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        with self._lock:
+            try:
+                with self._conn:
+                    rows = self._conn.execute(
+                        "UPDATE jobs SET error = ?, worker_id = NULL, "
+                        "lease_expires = NULL, "
+                        "status = CASE WHEN attempts < ? THEN 'pending' "
+                        "ELSE 'failed' END, "
+                        "finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END "
+                        "WHERE id = ? AND worker_id = ? AND status = 'running' "
+                        "RETURNING status",
+                        (
+                            error,
+                            self.max_attempts,
+                            self.max_attempts,
+                            time.time(),
+                            job_id,
+                            worker_id,
+                        ),
+                    ).fetchall()
+            except Exception as e:
+                raise JobQueueException(f"Failed to update job: {str(e)}") from e
+
+        return bool(rows) and rows[0][0] == "pending"
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload, status, attempts, worker_id, result, error "
+                    "FROM jobs WHERE id = ?",
+                    (job_id,),
+                ).fetchone()
+            except Exception as e:
+                raise JobQueueException(f"Failed to read job: {str(e)}") from e
+
+        if row is None:
+            return None
+        return Job(
+            row[0],
+            json.loads(row[1]),
+            row[2],
+            row[3],
+            row[4],
+            json.loads(row[5]) if row[5] else None,
+            row[6],
+        )
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            except Exception as e:
+                raise JobQueueException(f"Failed to count jobs: {str(e)}") from e
+
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params: tuple) -> bool:
+        with self._lock:
+            try:
+                with self._conn:
+                    return self._conn.execute(sql, params).rowcount == 1
+            except Exception as e:
+                raise JobQueueException(f"Failed to update job: {str(e)}") from e
@@ -0,0 +1,259 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+from ..exceptions import KnowledgeBaseException
+from ..utils.text_utils import tokenize
+
+DEFAULT_PATH = ".knowledge_base/corpus.db"
+MAX_AGE_DAYS = 30
+RECENT_MAX_AGE_DAYS = 1
+MAX_DOCUMENTS = 20000
+
+# Seconds a connection waits for another process's write to finish
+BUSY_TIMEOUT = 30.0
+
+# A document only answers a query if it matches most of the query's terms, and
+# queries with too few terms are always sent to the web
+MIN_TERM_COVERAGE = 0.6
+MIN_QUERY_TERMS = 2
+
+_RECENCY = re.compile(
+    r"\b(latest|recent|recently|today|current|currently|news|this (week|month|year))\b",
+    re.IGNORECASE,
+)
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_DAY = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    text TEXT NOT NULL,
+    published_date TEXT,
+    author TEXT,
+    length INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id);
+"""
+
+
+class KnowledgeBase:
+    """Local corpus of every fetched source, searchable with BM25 across runs."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        max_age_days: float = MAX_AGE_DAYS,
+        max_documents: int = MAX_DOCUMENTS,
+    ):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(
+                path, timeout=BUSY_TIMEOUT, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        except Exception as e:
+            raise KnowledgeBaseException(
+                f"Failed to open knowledge base: {str(e)}"
+            ) from e
+
+    def max_age_for(self, query: str) -> float:
+        # Queries asking for recent information only accept recently fetched pages
+        days = RECENT_MAX_AGE_DAYS if _RECENCY.search(query) else self.max_age_days
+        return days * _DAY
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        terms = set(tokenize(query))
+        if len(terms) < MIN_QUERY_TERMS:
+            return []
+
+        fresh_after = time.time() - self.max_age_for(query)
+        placeholders = ",".join("?" * len(terms))
+
+        with self._lock:
+            total, average_length = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM documents"
+            ).fetchone()
+            if not total:
+                return []
+
+            document_frequency = dict(
+                self._conn.execute(
+                    f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) "
+                    "GROUP BY term",
+                    tuple(terms),
+                )
+            )
+            rows = self._conn.execute(
+                "SELECT p.doc_id, p.term, p.tf, d.length FROM postings p "
+                "JOIN documents d ON d.id = p.doc_id "
+                f"WHERE p.term IN ({placeholders}) AND d.fetched_at >= ?",
+                (*terms, fresh_after),
+            ).fetchall()
+
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, int] = Counter()
+        for doc_id, term, tf, length in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            length_norm = 1 - _BM25_B + _BM25_B * length / (average_length or 1)
+            scores[doc_id] += idf * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * length_norm)
+            matched[doc_id] += 1
+
+        candidates = [
+            doc_id
+            for doc_id in scores
+            if matched[doc_id] / len(terms) >= MIN_TERM_COVERAGE
+        ]
+        ranked = sorted(candidates, key=lambda doc_id: -scores[doc_id])[:limit]
+        if not ranked:
+            return []
+
+        return self._load(ranked, query)
+
+    def add(self, results: list[dict]) -> None:
+        now = time.time()
+
+        with self._lock:
+            try:
+                with self._conn:
+                    for result in results:
+                        if result.get("url") and result.get("text"):
+                            self._upsert(result, now)
+                self._compact()
+            except Exception as e:
+                raise KnowledgeBaseException(
+                    f"Failed to add to knowledge base: {str(e)}"
+                ) from e
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact()
+
+    def _upsert(self, result: dict, now: float) -> None:
+        tokens = tokenize(f"{result.get('title') or ''} {result['text']}")
+
+        doc_id = self._conn.execute(
+            "INSERT INTO documents "
+            "(url, title, text, published_date, author, length, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET title = excluded.title, "
+            "text = excluded.text, published_date = excluded.published_date, "
+            "author = excluded.author, length = excluded.length, "
+            "fetched_at = excluded.fetched_at "
+            "RETURNING id",
+            (
+                result["url"],
+                result.get("title"),
+                result["text"],
+                result.get("published_date"),
+                result.get("author"),
+                len(tokens),
+                now,
+                now,
+            ),
+        ).fetchone()[0]
+
+        self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self._conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            ((term, doc_id, tf) for term, tf in Counter(tokens).items()),
+        )
+
+    def _load(self, doc_ids: list[int], query: str) -> list[dict]:
+        placeholders = ",".join("?" * len(doc_ids))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE documents SET accessed_at = ? WHERE id IN ({placeholders})",
+                (time.time(), *doc_ids),
+            )
+            rows = self._conn.execute(
+                "SELECT id, title, url, text, published_date, author FROM documents "
+                f"WHERE id IN ({placeholders})",
+                doc_ids,
+            ).fetchall()
+
+        by_id = {
+            row[0]: {
+                "title": row[1],
+                "url": row[2],
+                "text": row[3],
+                "highlights": None,
+                "published_date": row[4],
+                "author": row[5],
+                "query": query,
+                "source": "knowledge_base",
+            }
+            for row in rows
+        }
+        return [by_id[doc_id] for doc_id in doc_ids if doc_id in by_id]
+
+    def _compact(self) -> None:
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        if total <= self.max_documents:
+            return
+
+        # Drop stale documents first, then the least recently used ones. Their
+        # pages are reused by later inserts, so the file is not vacuumed, which
+        # would lock out every other connection meanwhile
+        target = int(self.max_documents * 0.9)
+        stale_before = time.time() - self.max_age_days * _DAY
+
+        with self._conn:
+            doomed = self._conn.execute(
+                "SELECT id FROM documents "
+                "ORDER BY fetched_at >= ?, accessed_at LIMIT ?",
+                (stale_before, total - target),
+            ).fetchall()
+
+            self._conn.executemany("DELETE FROM postings WHERE doc_id = ?", doomed)
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", doomed)
+
+
+_knowledge_base: KnowledgeBase | None = None
+_knowledge_base_lock = threading.Lock()
+
+
+def get_knowledge_base() -> KnowledgeBase | None:
+    global _knowledge_base
+
+    path = os.getenv("KNOWLEDGE_BASE_PATH", DEFAULT_PATH)
+    if not path:
+        return None
+
+    with _knowledge_base_lock:
+        if _knowledge_base is None:
+            _knowledge_base = KnowledgeBase(
+                path=path,
+                max_age_days=float(
+                    os.getenv("KNOWLEDGE_BASE_MAX_AGE_DAYS", MAX_AGE_DAYS)
+                ),
+                max_documents=int(
+                    os.getenv("KNOWLEDGE_BASE_MAX_DOCUMENTS", MAX_DOCUMENTS)
+                ),
+            )
+        return _knowledge_base
@@ -0,0 +1,282 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from ..exceptions import MCPServiceException
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 15.0
+
+# Tool results kept per (server, query), least recently used first out
+CACHE_SIZE = 1024
+
+# Keys in a server config that configure the tool call rather than the connection
+_TOOL_OPTIONS = ("tool", "query_argument", "arguments", "timeout")
+
+
+def load_server_configs(path: str | None = None) -> dict[str, dict]:
+    path = path or os.getenv("MCP_SERVERS_CONFIG")
+    if not path:
+        return {}
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            configs = json.load(f)
+    except Exception as e:
+        raise MCPServiceException(f"Failed to load MCP server config: {str(e)}") from e
+
+    return configs.get("servers", configs)
+
+
+class MCPClient:
+    def __init__(self, server_configs: dict[str, dict] | None = None):
+        self.server_configs = (
+            load_server_configs() if server_configs is None else server_configs
+        )
+
+        connections = {
+            name: {k: v for k, v in config.items() if k not in _TOOL_OPTIONS}
+            for name, config in self.server_configs.items()
+        }
+        self.client = MultiServerMCPClient(connections)
+
+        self._tools: dict[str, BaseTool] = {}
+        self._cache: OrderedDict[tuple[str, str], list[dict]] = OrderedDict()
+        self._sessions: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closed: asyncio.Event | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.server_configs)
+
+    async def acall(self, queries: list[str]) -> list[dict]:
+        if not self.enabled or not queries:
+            return []
+
+        await asyncio.to_thread(self.connect)
+
+        future = asyncio.run_coroutine_threadsafe(self._search(queries), self._loop)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=self._max_timeout() + 1
+            )
+        except TimeoutError:
+            future.cancel()
+            logger.warning("MCP tool calls timed out, continuing without MCP results")
+            return []
+
+    def connect(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self._loop.run_forever, name="mcp-client", daemon=True
+            ).start()
+
+            future = asyncio.run_coroutine_threadsafe(self._connect(), self._loop)
+            try:
+                future.result(timeout=CONNECT_TIMEOUT + 1)
+            except TimeoutError:
+                future.cancel()
+                logger.warning(
+                    "Connecting to MCP servers timed out, continuing without them"
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is None:
+                return
+
+            future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+            try:
+                future.result(timeout=CONNECT_TIMEOUT)
+            except TimeoutError:
+                future.cancel()
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            self._tools.clear()
+
+    async def _connect(self) -> None:
+        self._closed = asyncio.Event()
+
+        pending = {}
+        for name in self.server_configs:
+            ready = self._loop.create_future()
+            # Each session lives in its own task so it is entered and exited there
+            self._sessions.append(asyncio.create_task(self._hold_session(name, ready)))
+            pending[name] = ready
+
+        if not pending:
+            return
+
+        # One deadline for all servers, so hung servers do not add up
+        done, _ = await asyncio.wait(pending.values(), timeout=CONNECT_TIMEOUT)
+        for name, ready in pending.items():
+            if ready not in done:
+                ready.cancel()
+                logger.warning("Skipping MCP server '%s': timed out connecting", name)
+            elif e := ready.exception():
+                logger.warning(
+                    "Skipping MCP server '%s': %s", name, str(e) or type(e).__name__
+                )
+            else:
+                self._tools[name] = ready.result()
+
+    async def _hold_session(self, name: str, ready: asyncio.Future) -> None:
+        try:
+            async with self.client.session(name) as session:
+                tools = await load_mcp_tools(session)
+                ready.set_result(self._select_tool(name, tools))
+                await self._closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+
+    async def _close(self) -> None:
+        self._closed.set()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+        self._sessions.clear()
+
+    def _select_tool(self, name: str, tools: list[BaseTool]) -> BaseTool:
+        tool_name = self.server_configs[name].get("tool")
+        if tool_name:
+            for tool in tools:
+                if tool.name == tool_name:
+                    return tool
+            raise MCPServiceException(f"Tool '{tool_name}' not found")
+
+        if len(tools) != 1:
+            raise MCPServiceException(
+                f"Server exposes {len(tools)} tools, set 'tool' in its config"
+            )
+        return tools[0]
+
+    async def _search(self, queries: list[str]) -> list[dict]:
+        calls = [
+            (name, query)
+            for name in self._tools
+            for query in queries
+            if (name, query) not in self._cache
+        ]
+
+        responses = await asyncio.gather(
+            *(self._call_tool(name, query) for name, query in calls)
+        )
+        for key, response in zip(calls, responses, strict=True):
+            if response is not None:
+                self._cache[key] = response
+
+        results = []
+        for name in self._tools:
+            for query in queries:
+                cached = self._cache.get((name, query))
+                if cached is None:
+                    continue
+                self._cache.move_to_end((name, query))
+                # Callers preprocess results in place, the cache keeps the originals
+                results.extend(dict(result) for result in cached)
+
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return results
+
+    async def _call_tool(self, name: str, query: str) -> list[dict] | None:
+        config = self.server_configs[name]
+        arguments = {
+            **config.get("arguments", {}),
+            config.get("query_argument", "query"): query,
+        }
+
+        try:
+            content = await asyncio.wait_for(
+                self._tools[name].ainvoke(arguments),
+                config.get("timeout", DEFAULT_TIMEOUT),
+            )
+        except TimeoutError:
+            logger.warning("MCP server '%s' timed out for query: %s", name, query)
+            return None
+        except Exception as e:
+            logger.warning("MCP server '%s' failed for query: %s (%s)", name, query, e)
+            return None
+
+        return _format_results(name, query, _content_to_text(content))
+
+    def _max_timeout(self) -> float:
+        return max(
+            config.get("timeout", DEFAULT_TIMEOUT)
+            for config in self.server_configs.values()
+        )
+
+
+def _content_to_text(content) -> str:
+    if isinstance(content, tuple):
+        content = content[0]
+    if isinstance(content, str):
+        return content
+
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "\n".join(parts)
+
+
+def _format_results(server: str, query: str, text: str) -> list[dict]:
+    # Search-style tools return a JSON list of documents, anything else is one source
+    try:
+        documents = json.loads(text)
+    except ValueError:
+        documents = None
+
+    if isinstance(documents, dict):
+        documents = documents.get("results")
+
+    if not isinstance(documents, list) or not all(
+        isinstance(doc, dict) for doc in documents
+    ):
+        documents = [{"title": f"{server}: {query}", "text": text}]
+
+    return [
+        {
+            "title": doc.get("title"),
+            "url": doc.get("url"),
+            "text": doc.get("text") or doc.get("content"),
+            "highlights": None,
+            "published_date": doc.get("published_date"),
+            "author": doc.get("author"),
+            "query": query,
+            "source": f"mcp:{server}",
+        }
+        for doc in documents
+    ]
+
+
+_mcp_client: MCPClient | None = None
+_mcp_client_lock = threading.Lock()
+
+
+def get_mcp_client() -> MCPClient:
+    global _mcp_client
+
+    with _mcp_client_lock:
+        if _mcp_client is None:
+            _mcp_client = MCPClient()
+            atexit.register(_mcp_client.close)
+        return _mcp_client
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+
+from openai import AsyncOpenAI
+
+from ..exceptions import APIKeyException, LLMServiceException
+from .openai_client import get_async_openai
+
+COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_INTERVAL = 60.0
+
+_FINISHED = ("completed", "failed", "expired", "cancelled")
+
+
+class OpenAIBatchClient:
+    """Runs chat completion requests through the OpenAI Batch API, which costs
+    half as much as synchronous calls in exchange for finishing within the
+    completion window rather than immediately."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        completion_window: str = COMPLETION_WINDOW,
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise APIKeyException(
+                "OpenAI API key must be set in OPENAI_API_KEY environment variable"
+            )
+
+        self.completion_window = completion_window
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_async_openai(self.api_key)
+
+    async def submit(
+        self, requests: dict[str, dict], metadata: dict[str, str] | None = None
+    ) -> str:
+        """Uploads `requests`, chat completion bodies keyed by a custom ID, as one
+        batch and returns the batch ID."""
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": COMPLETIONS_ENDPOINT,
+                    "body": body,
+                }
+            )
+            for custom_id, body in requests.items()
+        ]
+
+        try:
+            batch_file = await self.client.files.create(
+                file=("requests.jsonl", "\n".join(lines).encode()),
+                purpose="batch",
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint=COMPLETIONS_ENDPOINT,
+                completion_window=self.completion_window,
+                metadata=metadata,
+            )
+        except Exception as e:
+            raise LLMServiceException(
+                f"OpenAI batch submission failed: {str(e)}"
+            ) from e
+
+        return batch.id
+
+    async def wait(
+        self, batch_id: str, poll_interval: float = POLL_INTERVAL
+    ) -> dict[str, dict]:
+        """Polls the batch until it finishes and returns its responses keyed by
+        custom ID, each either `{"body": completion}` or `{"error": message}`.
+        Requests missing from the output, e.g. because the batch expired, are
+        left out."""
+        try:
+            batch = await self.client.batches.retrieve(batch_id)
+            while batch.status not in _FINISHED:
+                await asyncio.sleep(poll_interval)
+                batch = await self.client.batches.retrieve(batch_id)
+
+            if batch.status == "failed":
+                errors = batch.errors.data if batch.errors else None
+                messages = "; ".join(str(error.message) for error in errors or [])
+                raise LLMServiceException(f"OpenAI batch {batch_id} failed: {messages}")
+
+            responses = {}
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                content = await self.client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if line.strip():
+                        item = json.loads(line)
+                        responses[item["custom_id"]] = _response(item)
+        except LLMServiceException:
+            raise
+        except Exception as e:
+            raise LLMServiceException(f"OpenAI batch polling failed: {str(e)}") from e
+
+        return responses
+
+
+def _response(item: dict) -> dict:
+    response = item.get("response") or {}
+    if item.get("error") or response.get("status_code") != 200:
+        error = item.get("error") or response.get("body", {}).get("error")
+        return {"error": str(error)}
+    return {"body": response["body"]}
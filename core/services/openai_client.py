@@ -1,16 +1,29 @@
+import asyncio
 import json
 import os
+import threading
+import time
+from collections.abc import AsyncIterator
+from functools import partial
 from typing import TypeVar
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from ..exceptions import APIKeyException, LLMServiceException
+from .hedging import get_hedger
 
 T = TypeVar("T", bound=BaseModel)
 
 
 class OpenAIClient:
+    """Chat completions client that records the usage of its own calls.
+
+    Instances are cheap and made per node call so each node reports its own
+    usage. The HTTP clients underneath, and their connection pools, are shared
+    by every instance in the process with the same API key.
+    """
+
     def __init__(self, api_key: str | None = None, model: str = "gpt-4.1"):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -19,37 +32,164 @@ class OpenAIClient:
             )
 
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        self.usage: list[dict] = []
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        return get_async_openai(self.api_key)
 
-    def call(
+    async def acall(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.5,
         response_format: type[T] | None = None,
         model: str | None = None,
-    ) -> str:
+        label: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> str | T:
+        kwargs = self._completion_kwargs(
+            system_prompt,
+            user_prompt,
+            temperature,
+            response_format is not None,
+            model,
+            prompt_cache_key,
+        )
+        request = partial(self.async_client.chat.completions.create, **kwargs)
+        hedger = get_hedger()
+        started = time.perf_counter()
+
         try:
-            messages = [
+            if hedger:
+                completion, _ = await hedger.arun(label or "llm", request)
+            else:
+                completion = await request()
+            return self._parse(completion, response_format, label, started)
+        except Exception as e:
+            raise LLMServiceException(f"OpenAI API call failed: {str(e)}") from e
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.5,
+        json_output: bool = False,
+        model: str | None = None,
+        label: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> AsyncIterator[str]:
+        kwargs = self._completion_kwargs(
+            system_prompt,
+            user_prompt,
+            temperature,
+            json_output,
+            model,
+            prompt_cache_key,
+            stream=True,
+        )
+        request = partial(self.async_client.chat.completions.create, **kwargs)
+        hedger = get_hedger()
+        started = time.perf_counter()
+
+        try:
+            # Streams are hedged on their time to first chunk
+            chunks = (
+                hedger.astream(label or "llm", request) if hedger else await request()
+            )
+            async for chunk in chunks:
+                content = self._parse_chunk(chunk, label, started)
+                if content:
+                    yield content
+
+        except Exception as e:
+            raise LLMServiceException(f"OpenAI API stream failed: {str(e)}") from e
+
+    def _completion_kwargs(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        json_output: bool,
+        model: str | None,
+        prompt_cache_key: str | None,
+        stream: bool = False,
+    ) -> dict:
+        kwargs = {
+            "model": model or self.model,
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
-            ]
+            ],
+            "temperature": temperature,
+        }
+
+        if stream:
+            kwargs["stream"] = True
+            kwargs["stream_options"] = {"include_usage": True}
+        if json_output:
+            kwargs["response_format"] = {"type": "json_object"}
+        if prompt_cache_key:
+            kwargs["prompt_cache_key"] = prompt_cache_key
+
+        return kwargs
+
+    def _parse(
+        self,
+        completion,
+        response_format: type[T] | None,
+        label: str | None,
+        started: float,
+    ) -> str | T:
+        self._record_usage(completion, label, started)
+        content = completion.choices[0].message.content
 
-            kwargs = {
-                "model": model or self.model,
-                "messages": messages,
-                "temperature": temperature,
+        if response_format:
+            return response_format(**json.loads(content))
+        return content
+
+    def _parse_chunk(self, chunk, label: str | None, started: float) -> str | None:
+        # The final chunk carries usage and no choices
+        if chunk.usage:
+            self._record_usage(chunk, label, started)
+        if chunk.choices:
+            return chunk.choices[0].delta.content
+        return None
+
+    def _record_usage(self, completion, label: str | None, started: float) -> None:
+        usage = completion.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+
+        self.usage.append(
+            {
+                "label": label,
+                "model": completion.model,
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "latency": time.perf_counter() - started,
             }
+        )
 
-            if response_format:
-                kwargs["response_format"] = {"type": "json_object"}
-                completion = self.client.chat.completions.create(**kwargs)
-                content = completion.choices[0].message.content
-                parsed_data = json.loads(content)
-                return response_format(**parsed_data)
 
-            completion = self.client.chat.completions.create(**kwargs)
-            return completion.choices[0].message.content
+# Async clients keep connections bound to the event loop they were opened on
+_async_openai_clients: dict[
+    tuple[str, int], tuple[asyncio.AbstractEventLoop, AsyncOpenAI]
+] = {}
+_openai_clients_lock = threading.Lock()
 
-        except Exception as e:
-            raise LLMServiceException(f"OpenAI API call failed: {str(e)}") from e
+
+def get_async_openai(api_key: str) -> AsyncOpenAI:
+    """Returns the process's AsyncOpenAI client for `api_key` on the running
+    event loop."""
+    loop = asyncio.get_running_loop()
+
+    with _openai_clients_lock:
+        for key, (client_loop, _) in list(_async_openai_clients.items()):
+            if client_loop.is_closed():
+                del _async_openai_clients[key]
+
+        key = (api_key, id(loop))
+        if key not in _async_openai_clients:
+            _async_openai_clients[key] = (loop, AsyncOpenAI(api_key=api_key))
+        return _async_openai_clients[key][1]
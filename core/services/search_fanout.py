@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ..exceptions import KnowledgeBaseException
+from .exa_client import ExaClient
+from .knowledge_base import KnowledgeBase, get_knowledge_base
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_SEARCHES = 8
+TEXT_MAX_CHARACTERS = 2000
+
+# Seconds a finished search nobody has fetched yet stays available to fetch
+PENDING_TTL = 60.0
+
+
+@dataclass
+class SearchOutcome:
+    results: list[dict] = field(default_factory=list)
+    web_calls: int = 0
+    latency: float = 0.0
+
+
+@dataclass
+class _Pending:
+    future: Future
+    waiters: int = 0
+    expires: float = math.inf
+
+
+class SearchFanout:
+    """Runs searches in the background so they can start before they are needed.
+
+    Submitting the same query twice returns the pending search, which lets the
+    query generation step start searches that the search step later collects.
+    A search that is not fetched within `PENDING_TTL` seconds of finishing is
+    dropped, and one that every fetching caller has given up on is cancelled if
+    it has not started yet.
+    Queries are answered from the local knowledge base when it has enough fresh
+    matches, and everything fetched from Exa is added to it. Searches given
+    `published_after`, an ISO 8601 date, only return pages published since then.
+    """
+
+    def __init__(
+        self,
+        exa: ExaClient | None = None,
+        knowledge_base: KnowledgeBase | None = None,
+        max_workers: int = MAX_CONCURRENT_SEARCHES,
+    ):
+        self._exa = exa
+        self.knowledge_base = knowledge_base
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="search")
+        self._pending: dict[tuple[str, int, str | None], _Pending] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def exa(self) -> ExaClient:
+        if self._exa is None:
+            self._exa = ExaClient()
+        return self._exa
+
+    def submit(
+        self, query: str, num_results: int = 5, published_after: str | None = None
+    ) -> Future:
+        return self._acquire((query, num_results, published_after)).future
+
+    async def afetch(
+        self, query: str, num_results: int = 5, published_after: str | None = None
+    ) -> SearchOutcome:
+        # Searches stay on the shared thread pool, which also serves the
+        # synchronous knowledge base, and are awaited from any event loop
+        key = (query, num_results, published_after)
+        pending = self._acquire(key, waiting=True)
+        try:
+            # Shielded so a cancelled caller does not cancel a search other
+            # callers are waiting for; _release() decides that
+            return _copy(await asyncio.shield(asyncio.wrap_future(pending.future)))
+        finally:
+            self._release(key, pending)
+
+    def _acquire(
+        self, key: tuple[str, int, str | None], waiting: bool = False
+    ) -> _Pending:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                expired_key
+                for expired_key, pending in self._pending.items()
+                if pending.expires < now and not pending.waiters
+            ]
+            for expired_key in expired:
+                del self._pending[expired_key]
+
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = _Pending(self._executor.submit(self._search, *key))
+                pending.future.add_done_callback(
+                    lambda _: setattr(
+                        pending, "expires", time.monotonic() + PENDING_TTL
+                    )
+                )
+                self._pending[key] = pending
+
+            if waiting:
+                pending.waiters += 1
+            return pending
+
+    def _release(self, key: tuple[str, int, str | None], pending: _Pending) -> None:
+        with self._lock:
+            pending.waiters -= 1
+            if pending.waiters:
+                return
+
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+        # Does nothing once the search has started
+        pending.future.cancel()
+
+    def _search(
+        self, query: str, num_results: int, published_after: str | None
+    ) -> SearchOutcome:
+        started = time.perf_counter()
+
+        known = self._search_knowledge_base(query, num_results)
+        if published_after:
+            known = [
+                result for result in known if _published_since(result, published_after)
+            ]
+        if len(known) >= num_results:
+            return SearchOutcome(known, 0, time.perf_counter() - started)
+
+        # Only the results the knowledge base could not provide are fetched
+        results = self.exa.call(
+            query=query,
+            num_results=num_results - len(known),
+            text={"max_characters": TEXT_MAX_CHARACTERS},
+            start_published_date=published_after,
+        )
+
+        # Add the search query to each result for reference in compression prompt
+        for result in results:
+            result["query"] = query
+
+        if self.knowledge_base is not None:
+            try:
+                self.knowledge_base.add(results)
+            except KnowledgeBaseException as e:
+                logger.warning("Knowledge base update failed: %s", e)
+
+        fetched_urls = {result["url"] for result in results}
+        merged = [r for r in known if r["url"] not in fetched_urls] + results
+        return SearchOutcome(
+            merged[:num_results],
+            1,
+            time.perf_counter() - started,
+        )
+
+    def _search_knowledge_base(self, query: str, num_results: int) -> list[dict]:
+        if self.knowledge_base is None:
+            return []
+
+        try:
+            return self.knowledge_base.search(query, limit=num_results)
+        except KnowledgeBaseException as e:
+            logger.warning("Knowledge base search failed: %s", e)
+            return []
+
+
+def _published_since(result: dict, published_after: str) -> bool:
+    # Compared by day, since publication dates come in varying precision
+    published = result.get("published_date") or ""
+    return published[:10] >= published_after[:10]
+
+
+def _copy(outcome: SearchOutcome) -> SearchOutcome:
+    return SearchOutcome(
+        results=[dict(result) for result in outcome.results],
+        web_calls=outcome.web_calls,
+        latency=outcome.latency,
+    )
+
+
+_search_fanout: SearchFanout | None = None
+_search_fanout_lock = threading.Lock()
+
+
+def get_search_fanout() -> SearchFanout:
+    global _search_fanout
+
+    with _search_fanout_lock:
+        if _search_fanout is None:
+            _search_fanout = SearchFanout(knowledge_base=get_knowledge_base())
+        return _search_fanout
@@ -1,7 +1,20 @@
 """Utility modules for the deep research agent."""
 
-from .report_utils import save_report_to_disk
+from .citation_utils import expand_citations, remap_citations
+from .json_stream import JSONArrayStreamParser
+from .profiling import NodeProfiler
+from .report_utils import load_run_artifact, save_report_to_disk, save_run_artifact
+from .text_utils import preprocess_search_result, select_passages, tokenize
 
 __all__ = [
+    "JSONArrayStreamParser",
+    "NodeProfiler",
+    "expand_citations",
+    "remap_citations",
     "save_report_to_disk",
+    "save_run_artifact",
+    "load_run_artifact",
+    "preprocess_search_result",
+    "select_passages",
+    "tokenize",
 ]
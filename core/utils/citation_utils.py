@@ -0,0 +1,87 @@
+import re
+
+# A single ID such as S3 or a range such as S3-S5
+_CITATION_ITEM = r"S\d+(?:\s*[-–—]\s*S?\d+)?"
+CITATION_PATTERN = re.compile(rf"\[({_CITATION_ITEM}(?:\s*[,;]\s*{_CITATION_ITEM})*)\]")
+_CITATION_RANGE = re.compile(r"S(\d+)(?:\s*[-–—]\s*S?(\d+))?")
+
+# Longest range that is expanded, anything longer is cut to this many IDs
+MAX_CITATION_RANGE = 20
+
+# Target of citations to sources without a URL, the reference list's heading
+REFERENCES_ANCHOR = "#references"
+
+
+def format_source_id(index: int) -> str:
+    return f"S{index}"
+
+
+def _cited_ids(citation: str) -> list[str]:
+    """Source IDs in the text of a citation, with ranges such as `S3-S5`
+    expanded."""
+    ids = []
+    for match in _CITATION_RANGE.finditer(citation):
+        first = int(match[1])
+        last = int(match[2]) if match[2] else first
+        if last < first:
+            first, last = last, first
+        last = min(last, first + MAX_CITATION_RANGE - 1)
+        ids.extend(format_source_id(i) for i in range(first, last + 1))
+    return ids
+
+
+def remap_citations(text: str, id_map: dict[str, str]) -> str:
+    # Rewrites source IDs, e.g. from a subgraph's numbering to the run's
+    def replace(match: re.Match) -> str:
+        ids = [
+            id_map[source_id]
+            for source_id in _cited_ids(match.group(1))
+            if source_id in id_map
+        ]
+        return f"[{', '.join(dict.fromkeys(ids))}]" if ids else ""
+
+    return CITATION_PATTERN.sub(replace, text)
+
+
+def expand_citations(report: str, search_results: list[dict]) -> str:
+    sources = {
+        result["source_id"]: result
+        for result in search_results
+        if result.get("source_id")
+    }
+
+    # Number sources by first citation so the reference list reads in order
+    numbers: dict[str, int] = {}
+
+    def replace(match: re.Match) -> str:
+        links = []
+        for source_id in dict.fromkeys(_cited_ids(match.group(1))):
+            source = sources.get(source_id)
+            if source is None:
+                continue
+
+            if source_id not in numbers:
+                numbers[source_id] = len(numbers) + 1
+            number = numbers[source_id]
+
+            # Sources without a URL link to their entry in the reference list
+            links.append(f"[[{number}]]({source.get('url') or REFERENCES_ANCHOR})")
+
+        return "".join(links)
+
+    body = CITATION_PATTERN.sub(replace, report).rstrip()
+
+    if not numbers:
+        return body
+
+    references = []
+    for source_id, number in numbers.items():
+        source = sources[source_id]
+        title = source.get("title") or source.get("url") or "Untitled"
+        title = title.replace("[", "(").replace("]", ")")
+        url = source.get("url")
+        references.append(
+            f"{number}. [{title}]({url})" if url else f"{number}. {title}"
+        )
+
+    return f"{body}\n\n## References\n\n" + "\n".join(references) + "\n"
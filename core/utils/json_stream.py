@@ -0,0 +1,79 @@
+import json
+
+
+class JSONArrayStreamParser:
+    """Incrementally parses streamed JSON and emits the strings of one array field.
+
+    Each string in the array under `key` is returned from `feed` as soon as its
+    closing quote arrives, before the rest of the document has been generated.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        # Each entry is (container type, key the container was stored under)
+        self._stack: list[tuple[str, str | None]] = []
+        self._in_string = False
+        self._escape = False
+        self._buffer: list[str] = []
+        self._expecting_key = False
+        self._last_key: str | None = None
+
+    def feed(self, chunk: str) -> list[str]:
+        items = []
+
+        for char in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    item = self._close_string()
+                    if item is not None:
+                        items.append(item)
+                    continue
+                self._buffer.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._buffer = []
+            elif char in "{[":
+                self._stack.append(
+                    ("object" if char == "{" else "array", self._value_key())
+                )
+                self._expecting_key = char == "{"
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._expecting_key = False
+            elif char == ":":
+                self._expecting_key = False
+            elif char == ",":
+                self._expecting_key = (
+                    bool(self._stack) and self._stack[-1][0] == "object"
+                )
+
+        return items
+
+    def _value_key(self) -> str | None:
+        if self._stack and self._stack[-1][0] == "object":
+            return self._last_key
+        return None
+
+    def _close_string(self) -> str | None:
+        value = json.loads('"' + "".join(self._buffer) + '"')
+
+        if not self._stack:
+            return None
+
+        container, container_key = self._stack[-1]
+        if container == "object":
+            if self._expecting_key:
+                self._last_key = value
+            return None
+
+        if container_key == self.key and len(self._stack) == 2:
+            return value
+        return None
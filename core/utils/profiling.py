@@ -0,0 +1,275 @@
+import functools
+import inspect
+import itertools
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from typing import get_type_hints
+
+from ..exceptions import FileOperationException
+
+SAMPLE_INTERVAL = 0.005
+TOP_ALLOCATIONS = 10
+
+
+# Innermost frames of threads waiting for work, whose samples are left out
+_IDLE_FRAMES = frozenset(
+    {
+        ("thread.py", "_worker"),
+        ("selectors.py", "select"),
+        ("threading.py", "wait"),
+    }
+)
+_PROFILER_THREAD = "node-profiler"
+
+
+class SamplingProfiler:
+    """Samples the call stacks of the process's threads on a timer and counts the
+    folded stacks, each rooted at its thread's name.
+
+    The thread `thread_id` (the one the node runs on) is always sampled. Other
+    threads, such as the pools that searches and PDF rendering run on, are
+    sampled while they are busy and skipped while they wait for work.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=_PROFILER_THREAD, daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        # One "frame;frame;frame count" line per stack, as read by flamegraph.pl,
+        # speedscope and inferno
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            names = {
+                thread.ident: thread.name
+                for thread in threading.enumerate()
+                if not thread.name.startswith(_PROFILER_THREAD)
+            }
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in names:
+                    continue
+
+                code = frame.f_code
+                idle = (os.path.basename(code.co_filename), code.co_name)
+                if thread_id != self.thread_id and idle in _IDLE_FRAMES:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names[thread_id])
+
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class _MemoryPeaks:
+    """Tracks the tracemalloc peak of each node call while calls overlap.
+
+    tracemalloc has one process-wide peak, so it is read and reset whenever a
+    call starts or finishes, and the peak of each interval goes to every call
+    that was running through all of it.
+    """
+
+    def __init__(self):
+        self._peaks: dict[int, int] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def start(self) -> tuple[int, int]:
+        """Starts tracking a call, returning its token and the current memory."""
+        with self._lock:
+            current = self._flush()
+            token = next(self._tokens)
+            self._peaks[token] = current
+            return token, current
+
+    def stop(self, token: int) -> tuple[int, int]:
+        """Returns the current memory and the call's peak."""
+        with self._lock:
+            current = self._flush()
+            return current, self._peaks.pop(token)
+
+    def _flush(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for token, call_peak in self._peaks.items():
+            self._peaks[token] = max(call_peak, peak)
+        return current
+
+
+_memory_peaks = _MemoryPeaks()
+
+
+class NodeProfiler:
+    """Wraps graph nodes with a sampling CPU profiler and tracemalloc snapshots.
+
+    Each node call writes a folded stack file to the output directory and appends
+    its timings, memory deltas and the resulting state size to summary.jsonl.
+    Samples and memory figures are process-wide, so nodes that run in the same
+    step overlap, but each call's peak covers only the time it was running.
+    """
+
+    def __init__(self, output_dir: str, state_schema: type | None = None):
+        self.output_dir = output_dir
+        self._reducers = _reducers(state_schema) if state_schema else {}
+        self._calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except Exception as e:
+            raise FileOperationException(
+                f"Failed to create profile directory: {str(e)}"
+            ) from e
+
+    def wrap(self, name: str, node: Callable) -> Callable:
+        if inspect.iscoroutinefunction(node):
+
+            @functools.wraps(node)
+            async def async_wrapper(state, *args, **kwargs):
+                start = self._start()
+                try:
+                    update = await node(state, *args, **kwargs)
+                except BaseException:
+                    self._finish(name, state, {}, start, failed=True)
+                    raise
+                self._finish(name, state, update, start)
+                return update
+
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            start = self._start()
+            try:
+                update = node(state, *args, **kwargs)
+            except BaseException:
+                self._finish(name, state, {}, start, failed=True)
+                raise
+            self._finish(name, state, update, start)
+            return update
+
+        return wrapper
+
+    def _start(self) -> tuple:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        snapshot = tracemalloc.take_snapshot()
+        memory_token, current = _memory_peaks.start()
+
+        sampler = SamplingProfiler(threading.get_ident())
+        sampler.start()
+
+        return (
+            sampler,
+            snapshot,
+            memory_token,
+            current,
+            time.perf_counter(),
+            time.process_time(),
+        )
+
+    def _finish(
+        self,
+        name: str,
+        state: dict,
+        update: dict | None,
+        start: tuple,
+        failed: bool = False,
+    ) -> None:
+        (
+            sampler,
+            snapshot_before,
+            memory_token,
+            current_before,
+            wall_start,
+            cpu_start,
+        ) = start
+
+        sampler.stop()
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        current_after, peak = _memory_peaks.stop(memory_token)
+        retained = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")
+
+        with self._lock:
+            self._calls[name] += 1
+            call = self._calls[name]
+
+        stem = os.path.join(self.output_dir, f"{name}.{call}")
+        summary = {
+            "node": name,
+            "call": call,
+            "failed": failed,
+            "wall_seconds": round(wall_seconds, 4),
+            "process_cpu_seconds": round(cpu_seconds, 4),
+            "samples": sum(sampler.stacks.values()),
+            "peak_memory_delta": peak - current_before,
+            "retained_memory_delta": current_after - current_before,
+            "top_retained": [str(stat) for stat in retained[:TOP_ALLOCATIONS]],
+            "state_bytes": self._state_size(state, update or {}),
+            "flame_graph": f"{stem}.folded",
+        }
+
+        try:
+            with open(f"{stem}.folded", "w", encoding="utf-8") as f:
+                f.write(sampler.folded())
+            with (
+                self._lock,
+                open(
+                    os.path.join(self.output_dir, "summary.jsonl"),
+                    "a",
+                    encoding="utf-8",
+                ) as f,
+            ):
+                f.write(json.dumps(summary) + "\n")
+        except Exception as e:
+            raise FileOperationException(f"Failed to write profile: {str(e)}") from e
+
+    def _state_size(self, state: dict, update: dict) -> int:
+        # Apply the schema's reducers so the size matches the state the graph keeps
+        new_state = dict(state)
+        for key, value in update.items():
+            reducer = self._reducers.get(key)
+            new_state[key] = (
+                reducer(state[key], value) if reducer and key in state else value
+            )
+
+        try:
+            return len(pickle.dumps(new_state, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return len(json.dumps(new_state, default=str))
+
+
+def _reducers(state_schema: type) -> dict[str, Callable]:
+    return {
+        key: hint.__metadata__[0]
+        for key, hint in get_type_hints(state_schema, include_extras=True).items()
+        if getattr(hint, "__metadata__", None)
+    }
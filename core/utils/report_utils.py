@@ -1,3 +1,4 @@
+import json
 import os
 
 import markdown
@@ -40,6 +41,35 @@ def save_report_to_disk(
     return markdown_path, pdf_path
 
 
+def save_run_artifact(
+    artifact: dict,
+    filename: str,
+    reports_dir: str = "reports",
+) -> str:
+    os.makedirs(reports_dir, exist_ok=True)
+
+    artifact_path = os.path.join(reports_dir, f"{filename}.json")
+
+    try:
+        with open(artifact_path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        raise FileOperationException(f"Failed to save run artifact: {str(e)}") from e
+
+    return artifact_path
+
+
+def load_run_artifact(path: str) -> dict:
+    # The artifact sits next to the report, so the report's path works as well
+    artifact_path = f"{os.path.splitext(path)[0]}.json"
+
+    try:
+        with open(artifact_path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        raise FileOperationException(f"Failed to load run artifact: {str(e)}") from e
+
+
 def _create_styled_html(html_content: str) -> str:
     return f"""
     <!DOCTYPE html>
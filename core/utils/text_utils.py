@@ -0,0 +1,197 @@
+import math
+import re
+from collections import Counter
+
+EXCERPT_MAX_CHARS = 400
+PASSAGE_TARGET_CHARS = 250
+
+# Weight of query terms relative to research brief terms when scoring passages
+QUERY_WEIGHT = 2.0
+BRIEF_WEIGHT = 0.5
+
+STOPWORDS = frozenset(
+    """a about above after again against all am an and any are as at be because
+    been before being below between both but by can could did do does doing down
+    during each few for from further had has have having he her here hers him his
+    how i if in into is it its itself just me more most my no nor not now of off on
+    once only or other our ours out over own same she should so some such than that
+    the their theirs them then there these they this those through to too under
+    until up very was we were what when where which while who whom why will with
+    would you your yours""".split()
+)
+
+# A line with navigation phrases or links is dropped only if fewer content words
+# than this are left once they are removed
+MIN_CONTENT_WORDS = 3
+
+# Whole words only, hyphenated compounds such as "cookie-cutter" included
+_BOILERPLATE = re.compile(
+    r"(?<![\w-])(?:cookies?|privacy policy|terms of (use|service)|"
+    r"all rights reserved|subscribe|newsletter|sign (in|up)|log ?in|"
+    r"create an account|skip to (main )?content|accept all|share (this|on)|"
+    r"follow us|advertisement|related (posts|articles)|read more|click here)"
+    r"(?![\w-])|©",
+    re.IGNORECASE,
+)
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_LINK_ONLY = re.compile(r"^(\W*\[[^\]]*\]\([^)]*\)\W*)+$")
+_COPYRIGHT = re.compile(r"^\W*(copyright\s*)?(©|\(c\))", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in _TOKEN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def normalize_whitespace(text: str) -> str:
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drops the lines of `text` that are mostly navigation, such as link lists,
+    cookie banners, share widgets and copyright notices.
+
+    A line is only dropped for a navigation phrase if little else is left on it,
+    so sentences and data that mention cookies, logins or advertising are kept.
+    """
+    kept = []
+    for line in text.splitlines():
+        if not line.strip():
+            kept.append("")
+            continue
+
+        if _LINK_ONLY.match(line) or _COPYRIGHT.match(line):
+            continue
+        if not line.startswith("#") and _is_navigation(line):
+            continue
+
+        kept.append(line)
+
+    return normalize_whitespace("\n".join(kept))
+
+
+def _is_navigation(line: str) -> bool:
+    if not _BOILERPLATE.search(line) and not _LINK.search(line):
+        return False
+    # Sentences are prose even when they are short
+    stripped = line.rstrip()
+    if stripped.endswith((".", "!", "?")) and not stripped.endswith("..."):
+        return False
+
+    rest = _BOILERPLATE.sub(" ", _LINK.sub(" ", line))
+    return len(tokenize(rest)) < MIN_CONTENT_WORDS
+
+
+def split_passages(text: str, target_chars: int = PASSAGE_TARGET_CHARS) -> list[str]:
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if len(paragraph) <= target_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(_SENTENCE_END.split(paragraph))
+
+    passages = []
+    current = ""
+    for piece in filter(None, pieces):
+        if current and len(current) + len(piece) + 1 > target_chars:
+            passages.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        passages.append(current)
+
+    return passages
+
+
+def score_passages(
+    passages: list[str],
+    query: str,
+    context: str = "",
+) -> list[float]:
+    tokenized = [tokenize(passage) for passage in passages]
+    if not tokenized:
+        return []
+
+    weights = Counter()
+    for term in tokenize(context):
+        weights[term] = BRIEF_WEIGHT
+    for term in tokenize(query):
+        weights[term] = weights[term] + QUERY_WEIGHT
+
+    document_frequency = Counter(term for tokens in tokenized for term in set(tokens))
+    average_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+
+    scores = []
+    for tokens in tokenized:
+        term_frequency = Counter(tokens)
+        length_norm = 1 - _BM25_B + _BM25_B * len(tokens) / average_length
+
+        score = 0.0
+        for term, weight in weights.items():
+            tf = term_frequency.get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(tokenized) - df + 0.5) / (df + 0.5))
+            score += weight * idf * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * length_norm)
+        scores.append(score)
+
+    return scores
+
+
+def select_passages(
+    text: str,
+    query: str,
+    context: str = "",
+    max_chars: int = EXCERPT_MAX_CHARS,
+) -> str:
+    passages = split_passages(text)
+    scores = score_passages(passages, query, context)
+
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    has_match = any(score > 0 for score in scores)
+
+    selected = []
+    used = 0
+    for i in ranked:
+        if used >= max_chars:
+            break
+        if has_match and scores[i] <= 0:
+            break
+        if selected and used + len(passages[i]) > max_chars:
+            continue
+        selected.append(i)
+        used += len(passages[i])
+
+    # Keep the original reading order of the chosen passages
+    excerpt = " … ".join(passages[i] for i in sorted(selected))
+    if len(excerpt) <= max_chars:
+        return excerpt
+
+    # Cut at the last space rather than in the middle of a word
+    cut = excerpt.rfind(" ", 0, max_chars + 1)
+    return excerpt[:cut].rstrip(" …") if cut > 0 else excerpt[:max_chars]
+
+
+def preprocess_search_result(result: dict, research_brief: str = "") -> dict:
+    # The source text is kept as it was, only the excerpt is cleaned
+    text = strip_boilerplate(normalize_whitespace(result.get("text") or ""))
+
+    result["excerpt"] = select_passages(
+        text,
+        query=result.get("query", ""),
+        context=research_brief,
+    )
+
+    return result
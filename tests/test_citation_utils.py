@@ -0,0 +1,38 @@
+from core.utils.citation_utils import expand_citations, remap_citations
+
+
+def _sources(*urls: str | None) -> list[dict]:
+    return [
+        {"source_id": f"S{i}", "url": url, "title": f"Source {i}"}
+        for i, url in enumerate(urls, 1)
+    ]
+
+
+def test_ranges_are_expanded():
+    sources = _sources("https://a.example", "https://b.example", "https://c.example")
+
+    report = expand_citations("Grid storage grew [S1-S2] and [S2–S3].", sources)
+
+    assert report.startswith(
+        "Grid storage grew [[1]](https://a.example)[[2]](https://b.example) and "
+        "[[2]](https://b.example)[[3]](https://c.example)."
+    )
+
+
+def test_unknown_ids_are_dropped():
+    report = expand_citations("Claim [S7].", _sources("https://a.example"))
+
+    assert report == "Claim ."
+
+
+def test_sources_without_url_link_to_the_references():
+    report = expand_citations("Claim [S1, S2].", _sources("https://a.example", None))
+
+    assert report.startswith("Claim [[1]](https://a.example)[[2]](#references).")
+    assert report.endswith("1. [Source 1](https://a.example)\n2. Source 2\n")
+
+
+def test_remapped_ranges():
+    id_map = {"S1": "S7", "S2": "S8", "S3": "S9"}
+
+    assert remap_citations("Claim [S1-S3].", id_map) == "Claim [S7, S8, S9]."
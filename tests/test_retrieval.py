@@ -0,0 +1,190 @@
+import pytest
+
+from core.agents.planner import (
+    MAX_RESULTS_PER_QUERY,
+    MIN_RESULTS_PER_QUERY,
+    RESULTS_PER_QUERY,
+    plan_search,
+    split_budget,
+)
+from core.agents.retrieval import (
+    ALL_QUERIES,
+    EXPLORE_STEP,
+    SMOOTHING,
+    choose_num_results,
+    query_type,
+    result_hits,
+    update_stats,
+)
+
+
+def _result(url: str, title: str, query: str = "grid storage batteries") -> dict:
+    return {
+        "url": url,
+        "title": title,
+        "text": "Utilities deploy grid storage batteries at scale.",
+        "query": query,
+    }
+
+
+class TestQueryType:
+    def test_first_query_is_novel(self):
+        assert query_type("grid storage batteries", []) == "novel"
+
+    def test_overlap_with_earlier_queries(self):
+        previous = ["grid storage batteries"]
+
+        assert query_type("grid storage batteries utilities", previous) == "repeat"
+        assert query_type("grid storage policy europe", previous) == "related"
+        assert query_type("solar panel tariffs", previous) == "novel"
+
+    def test_query_without_terms_is_novel(self):
+        assert query_type("the of and", ["grid storage"]) == "novel"
+
+
+class TestResultHits:
+    def test_new_relevant_results_are_hits(self):
+        results = [
+            _result("https://a.example/1", "Grid storage batteries in Texas"),
+            _result("https://b.example/2", "Battery grid storage for utilities"),
+        ]
+
+        assert result_hits(results, []) == [True, True]
+
+    def test_known_urls_and_titles_are_duplicates(self):
+        known = [_result("https://a.example/1", "Grid storage batteries in Texas")]
+        results = [
+            _result("https://a.example/1", "Another title for the same page"),
+            _result("https://mirror.example/1", "Grid storage batteries in Texas"),
+            _result("https://c.example/3", "New grid storage batteries report"),
+        ]
+
+        assert result_hits(results, known) == [False, False, True]
+
+    def test_repeats_within_one_query_are_duplicates(self):
+        page = _result("https://a.example/1", "Grid storage batteries in Texas")
+
+        assert result_hits([page, dict(page)], []) == [True, False]
+
+    def test_off_topic_results_are_not_hits(self):
+        result = _result("https://d.example/4", "Cooking with cast iron pans")
+        result["text"] = "Seasoning a pan takes an hour."
+
+        assert result_hits([result], []) == [False]
+
+
+class TestUpdateStats:
+    def test_first_observation_sets_the_rates(self):
+        stats = update_stats({}, "novel", [True, False, True])
+
+        assert stats["novel"] == [1.0, 0.0, 1.0]
+        assert stats[ALL_QUERIES] == [1.0, 0.0, 1.0]
+
+    def test_rates_move_towards_new_observations(self):
+        stats = update_stats({}, "novel", [True, True])
+        stats = update_stats(stats, "novel", [False, True, True])
+
+        assert stats["novel"] == pytest.approx([1.0 - SMOOTHING, 1.0, 1.0])
+
+    def test_other_types_only_update_all_queries(self):
+        stats = update_stats({}, "novel", [True])
+        stats = update_stats(stats, "repeat", [False])
+
+        assert stats["novel"] == [1.0]
+        assert stats["repeat"] == [0.0]
+        assert stats[ALL_QUERIES] == pytest.approx([1.0 - SMOOTHING])
+
+    def test_input_is_not_modified(self):
+        stats = {"novel": [0.5], ALL_QUERIES: [0.5]}
+
+        update_stats(stats, "novel", [True])
+
+        assert stats == {"novel": [0.5], ALL_QUERIES: [0.5]}
+
+    def test_ranks_past_the_maximum_are_ignored(self):
+        stats = update_stats({}, "novel", [True] * (MAX_RESULTS_PER_QUERY + 5))
+
+        assert len(stats["novel"]) == MAX_RESULTS_PER_QUERY
+
+
+class TestChooseNumResults:
+    def test_default_before_any_observation(self):
+        assert choose_num_results({}, "novel", default=5) == 5
+
+    def test_stops_where_the_yield_drops(self):
+        stats = {"novel": [0.9, 0.8, 0.6, 0.2, 0.1]}
+
+        assert choose_num_results(stats, "novel", default=5) == 3
+
+    def test_explores_past_the_deepest_observed_rank(self):
+        stats = {"novel": [1.0, 1.0, 1.0]}
+
+        assert choose_num_results(stats, "novel", default=5) == 3 + EXPLORE_STEP
+
+    def test_never_below_the_minimum(self):
+        stats = {"repeat": [0.0, 0.0, 0.0]}
+
+        assert choose_num_results(stats, "repeat", default=5) == MIN_RESULTS_PER_QUERY
+
+    def test_falls_back_to_all_queries(self):
+        stats = {"novel": [1.0] * 8, ALL_QUERIES: [1.0, 0.1]}
+
+        assert choose_num_results(stats, "related", default=5) == MIN_RESULTS_PER_QUERY
+        assert choose_num_results(stats, "novel", default=5) == 8 + EXPLORE_STEP
+
+    @pytest.mark.parametrize("ceiling", [0, 1, MIN_RESULTS_PER_QUERY, 3])
+    def test_tight_ceiling(self, ceiling):
+        stats = {"novel": [1.0] * MAX_RESULTS_PER_QUERY}
+        expected = max(MIN_RESULTS_PER_QUERY, ceiling)
+
+        assert choose_num_results(stats, "novel", 5, ceiling=ceiling) == expected
+        assert choose_num_results({}, "novel", 5, ceiling=ceiling) == expected
+
+
+class TestTightBudget:
+    def _state(self, **budget) -> dict:
+        return {
+            "search_iteration": 1,
+            "llm_usage": [],
+            "search_usage": [
+                {"query": f"query {i}", "web_calls": 1, "latency": 1.0}
+                for i in range(4)
+            ],
+            **budget,
+        }
+
+    def test_queries_are_capped_by_the_search_budget(self):
+        num_queries, _ = plan_search(self._state(search_budget=6))
+
+        assert num_queries == 2
+
+    def test_no_queries_once_the_search_budget_is_used(self):
+        num_queries, _ = plan_search(self._state(search_budget=4))
+
+        assert num_queries == 0
+
+    def test_scaled_down_iterations_ask_for_fewer_results(self):
+        # A quarter of the default iteration's tokens are left after the report
+        state = self._state(token_budget=15000 + 20000 // 4)
+
+        num_queries, max_results = plan_search(state)
+        num_results = choose_num_results(
+            {"novel": [1.0] * MAX_RESULTS_PER_QUERY},
+            "novel",
+            default=RESULTS_PER_QUERY,
+            ceiling=max_results,
+        )
+
+        assert num_queries == 1
+        assert max_results == MIN_RESULTS_PER_QUERY
+        assert num_results == MIN_RESULTS_PER_QUERY
+
+    def test_no_queries_once_the_token_budget_is_used(self):
+        num_queries, _ = plan_search(self._state(token_budget=1000))
+
+        assert num_queries == 0
+
+    def test_subtopic_searches_stay_within_the_budget(self):
+        budget = split_budget(self._state(search_budget=7), parts=2)
+
+        assert budget["search_budget"] == 1
@@ -0,0 +1,38 @@
+from core.utils.text_utils import preprocess_search_result, strip_boilerplate
+
+
+class TestStripBoilerplate:
+    def test_navigation_lines_are_dropped(self):
+        text = "\n".join(
+            [
+                "Accept cookies",
+                "Subscribe",
+                "Sign up for our newsletter today",
+                "[Home](/) | [About](/about)",
+                "© 2024 Example Corp. All rights reserved.",
+                "Utilities deploy grid storage batteries at scale.",
+            ]
+        )
+
+        assert strip_boilerplate(text) == (
+            "Utilities deploy grid storage batteries at scale."
+        )
+
+    def test_content_mentioning_navigation_phrases_is_kept(self):
+        lines = [
+            "Google will phase out third-party cookies in Chrome by 2025.",
+            "Digital advertisement spending rose 12% in 2024.",
+            "Under the GDPR, a privacy policy must state how long data is kept",
+            "Revenue: $4.2B",
+            "- 42% YoY growth",
+        ]
+
+        assert strip_boilerplate("\n".join(lines)) == "\n".join(lines)
+
+
+def test_preprocessing_keeps_the_source_text():
+    text = "Accept cookies\nChrome will phase out third-party cookies by 2025."
+    result = preprocess_search_result({"text": text, "query": "chrome cookies"})
+
+    assert result["text"] == text
+    assert result["excerpt"] == "Chrome will phase out third-party cookies by 2025."
@@ -0,0 +1,474 @@
+"""Drives concurrent research runs against local stub backends.
+
+Runs `create_graph()` N at a time on one event loop, stepping N up through the given
+concurrency levels, and reports throughput, run latency percentiles, per-node
+queueing and service times, and the process RSS for each level. The OpenAI and
+Exa clients are pointed at stub servers in a separate process and the MCP client
+at stub MCP servers it starts itself, so the numbers reflect this process's own overhead (threads, prompt building, PDF rendering,
+memory, event loop contention) on top of realistic backend latency.
+
+    python -m tools.load_test --concurrency 1,2,4,8,16 --step-duration 120
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from contextvars import ContextVar
+
+from core.agents import create_graph, create_initial_state
+from core.agents.retrieval import result_hits
+from core.services import get_hedger
+
+from .stub_backends import LatencyModel, serve
+from .stub_mcp import server_config
+
+TOPICS = [
+    "How are utilities planning grid storage for renewable energy?",
+    "What is the current state of solid-state battery manufacturing?",
+    "How do large companies evaluate open-source LLMs for internal use?",
+    "What are the effects of remote work on urban office markets?",
+]
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+class RunTrace:
+    """Timestamps shared by the nodes of one run, including its subgraphs."""
+
+    def __init__(self):
+        self.last_finished = time.perf_counter()
+        self.lock = threading.Lock()
+
+
+_trace: ContextVar[RunTrace | None] = ContextVar("load_test_trace", default=None)
+
+
+class NodeTimer:
+    """Node wrapper recording how long each node waited and ran.
+
+    A node's wait is the time between the previous node of its run finishing and
+    the node starting, i.e. time spent in the graph scheduler and executor
+    queues rather than in the node itself.
+    """
+
+    def __init__(self):
+        self._samples: dict[str, list[tuple[float, float]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, name: str, node: Callable) -> Callable:
+        if inspect.iscoroutinefunction(node):
+
+            @functools.wraps(node)
+            async def async_wrapper(state, *args, **kwargs):
+                started, wait = self._start()
+                try:
+                    return await node(state, *args, **kwargs)
+                finally:
+                    self._finish(name, started, wait)
+
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            started, wait = self._start()
+            try:
+                return node(state, *args, **kwargs)
+            finally:
+                self._finish(name, started, wait)
+
+        return wrapper
+
+    def _start(self) -> tuple[float, float]:
+        trace = _trace.get()
+        started = time.perf_counter()
+        if trace is None:
+            return started, 0.0
+
+        with trace.lock:
+            return started, max(0.0, started - trace.last_finished)
+
+    def _finish(self, name: str, started: float, wait: float) -> None:
+        finished = time.perf_counter()
+        trace = _trace.get()
+        if trace is not None:
+            with trace.lock:
+                trace.last_finished = max(trace.last_finished, finished)
+        with self._lock:
+            self._samples[name].append((wait, finished - started))
+
+    def drain(self) -> dict[str, list[tuple[float, float]]]:
+        with self._lock:
+            samples, self._samples = self._samples, defaultdict(list)
+        return samples
+
+
+class RSSSampler:
+    """Polls the resident set size of this process and keeps the peak."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def reset(self) -> int:
+        peak, self.peak = self.peak, current_rss()
+        return peak
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Without /proc only the peak is available, in kilobytes except on macOS
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def run_step(
+    graph,
+    concurrency: int,
+    args: argparse.Namespace,
+    reports_dir: str,
+) -> dict:
+    deadline = time.monotonic() + args.step_duration
+    runs = []
+    errors = []
+    counter = itertools.count()
+
+    async def worker():
+        # Runs started before the deadline are allowed to finish
+        while time.monotonic() < deadline:
+            run = next(counter)
+            state = create_initial_state(
+                TOPICS[run % len(TOPICS)],
+                answers=["No preference"] * 4,
+                decompose=args.decompose,
+                reports_dir=reports_dir,
+                report_mode=args.report_mode,
+            )
+
+            token = _trace.set(RunTrace())
+            started = time.perf_counter()
+            try:
+                final_state = await graph.ainvoke(state)
+                runs.append(
+                    {
+                        "latency": time.perf_counter() - started,
+                        "sources": len(final_state.get("search_results", [])),
+                        "relevant_sources": sum(
+                            result_hits(final_state.get("search_results", []), [])
+                        ),
+                        "web_results": sum(
+                            search["num_results"]
+                            for search in final_state.get("search_usage", [])
+                            if search["web_calls"]
+                        ),
+                    }
+                )
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {str(e)}")
+            finally:
+                _trace.reset(token)
+
+    # Every run shares one event loop, as they would in an async server
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [run["latency"] for run in runs]
+    return {
+        "concurrency": concurrency,
+        "runs": len(runs),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_seconds": elapsed,
+        "runs_per_minute": len(runs) / elapsed * 60,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "mean_sources": sum(run["sources"] for run in runs) / len(runs) if runs else 0,
+        "mean_relevant_sources": (
+            sum(run["relevant_sources"] for run in runs) / len(runs) if runs else 0
+        ),
+        "mean_web_results": (
+            sum(run["web_results"] for run in runs) / len(runs) if runs else 0
+        ),
+    }
+
+
+def summarize_nodes(samples: dict[str, list[tuple[float, float]]]) -> dict:
+    return {
+        name: {
+            "calls": len(timings),
+            "wait_p50": percentile([wait for wait, _ in timings], 50),
+            "wait_p95": percentile([wait for wait, _ in timings], 95),
+            "duration_p50": percentile([duration for _, duration in timings], 50),
+            "duration_p95": percentile([duration for _, duration in timings], 95),
+        }
+        for name, timings in samples.items()
+    }
+
+
+def hedge_stats() -> dict:
+    hedger = get_hedger()
+    return hedger.stats() if hedger else {"requests": 0, "hedges": 0, "hedge_wins": 0}
+
+
+def print_step(step: dict) -> None:
+    def seconds(value: float | None) -> str:
+        return "-" if value is None else f"{value:.2f}s"
+
+    print(
+        f"concurrency {step['concurrency']:>3}: {step['runs']} runs, "
+        f"{step['errors']} errors, {step['runs_per_minute']:.2f} runs/min, "
+        f"p50 {seconds(step['latency_p50'])}, p95 {seconds(step['latency_p95'])}, "
+        f"p99 {seconds(step['latency_p99'])}, "
+        f"{step['mean_sources']:.0f} sources/run "
+        f"({step['mean_relevant_sources']:.0f} relevant), "
+        f"{step['mean_web_results']:.0f} web results/run, peak RSS {step['peak_rss'] / 2**20:.0f} MiB"
+    )
+    if step["first_error"]:
+        print(f"  first error: {step['first_error']}")
+    if step["hedging"]["hedges"]:
+        hedging = step["hedging"]
+        print(
+            f"  hedged {hedging['hedges']} of {hedging['requests']} requests, "
+            f"{hedging['hedge_wins']} hedges answered first"
+        )
+
+    print(f"  {'node':<18} {'calls':>6} {'wait p50/p95':>16} {'run p50/p95':>16}")
+    for name, node in sorted(step["nodes"].items()):
+        print(
+            f"  {name:<18} {node['calls']:>6} "
+            f"{seconds(node['wait_p50']):>7}/{seconds(node['wait_p95']):<8} "
+            f"{seconds(node['duration_p50']):>7}/{seconds(node['duration_p95']):<8}"
+        )
+
+
+def start_backends(latency: LatencyModel) -> multiprocessing.Process:
+    # The stubs run in their own process so they do not compete for the GIL
+    context = multiprocessing.get_context("spawn")
+    urls = context.Queue()
+    process = context.Process(target=serve, args=(latency, urls), daemon=True)
+    process.start()
+
+    openai_url, exa_url = urls.get(timeout=30)
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["EXA_BASE_URL"] = exa_url
+    os.environ["EXA_API_KEY"] = "stub"
+    return process
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test the research graph against stub backends."
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,2,4,8",
+        help="Comma-separated concurrency levels to step through",
+    )
+    parser.add_argument(
+        "--step-duration",
+        type=float,
+        default=120.0,
+        help="Seconds to keep starting runs at each concurrency level",
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for every backend delay, e.g. 0.1 for a quick pass",
+    )
+    parser.add_argument(
+        "--llm-first-token",
+        type=float,
+        default=LatencyModel.llm_first_token,
+        help="Median LLM time to first token in seconds",
+    )
+    parser.add_argument(
+        "--llm-tokens-per-second",
+        type=float,
+        default=LatencyModel.llm_tokens_per_second,
+        help="LLM generation speed",
+    )
+    parser.add_argument(
+        "--search-latency",
+        type=float,
+        default=LatencyModel.search,
+        help="Median search latency in seconds",
+    )
+    parser.add_argument(
+        "--sigma",
+        type=float,
+        default=LatencyModel.sigma,
+        help="Log-normal shape of the latency distributions",
+    )
+    parser.add_argument(
+        "--stall-probability",
+        type=float,
+        default=LatencyModel.stall_probability,
+        help="Fraction of backend requests that stall",
+    )
+    parser.add_argument(
+        "--stall",
+        type=float,
+        default=LatencyModel.stall,
+        help="Seconds a stalled request hangs for",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Enable request hedging (HEDGE_REQUESTS)",
+    )
+    parser.add_argument(
+        "--decompose",
+        action="store_true",
+        help="Run in decomposition mode",
+    )
+    parser.add_argument(
+        "--report-mode",
+        choices=["single", "sections"],
+        default="single",
+        help="Report mode to run",
+    )
+    parser.add_argument(
+        "--mcp-servers",
+        type=int,
+        default=1,
+        help="Number of stub MCP search servers to fan queries out to (0 for none)",
+    )
+    parser.add_argument(
+        "--knowledge-base",
+        default="",
+        metavar="PATH",
+        help="Knowledge base to use (disabled by default)",
+    )
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.5,
+        help="Stop ramping once this fraction of a step's runs fail",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Write the results as JSON to FILE",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show the agent's own output",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # The agent's own progress and warnings are only shown with --verbose
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("core").setLevel(logging.INFO if args.verbose else logging.ERROR)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    latency = LatencyModel(
+        llm_first_token=args.llm_first_token,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        search=args.search_latency,
+        sigma=args.sigma,
+        stall_probability=args.stall_probability,
+        stall=args.stall,
+        time_scale=args.time_scale,
+    )
+    backends = start_backends(latency)
+    os.environ["KNOWLEDGE_BASE_PATH"] = args.knowledge_base
+    if args.hedge:
+        os.environ["HEDGE_REQUESTS"] = "1"
+
+    timer = NodeTimer()
+    graph = create_graph(node_wrapper=timer.wrap)
+    rss = RSSSampler()
+    rss.start()
+
+    steps = []
+    try:
+        with tempfile.TemporaryDirectory() as reports_dir:
+            # The MCP client reads its config when a run first reaches MCP tools
+            mcp_config = os.path.join(reports_dir, "mcp_servers.json")
+            with open(mcp_config, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "servers": {
+                            f"stub-{i}": server_config(latency)
+                            for i in range(args.mcp_servers)
+                        }
+                    },
+                    f,
+                )
+            os.environ["MCP_SERVERS_CONFIG"] = mcp_config
+
+            for concurrency in levels:
+                timer.drain()
+                rss.reset()
+                hedges = hedge_stats()
+
+                step = asyncio.run(run_step(graph, concurrency, args, reports_dir))
+
+                step["nodes"] = summarize_nodes(timer.drain())
+                step["peak_rss"] = rss.reset()
+                step["hedging"] = {
+                    key: value - hedges[key] for key, value in hedge_stats().items()
+                }
+                steps.append(step)
+                print_step(step)
+
+                attempted = step["runs"] + step["errors"]
+                if attempted and step["errors"] / attempted > args.max_error_rate:
+                    print("Error rate exceeded, stopping the ramp")
+                    break
+    finally:
+        rss.stop()
+        backends.terminate()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"latency_model": vars(latency), "steps": steps}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+import email.policy
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.prompts import (
+    FILENAME_GENERATION_SYSTEM_PROMPT,
+    GENERATE_REPORT_SYSTEM_PROMPT,
+    REPORT_SECTION_SYSTEM_PROMPT,
+    SECTION_UPDATE_SYSTEM_PROMPT,
+)
+
+_WORDS = (
+    "analysis adoption benchmark capacity cost deployment efficiency evidence "
+    "growth impact infrastructure latency market model outcome performance "
+    "policy research result risk scale study survey system trend workload"
+).split()
+
+# Rough output sizes in tokens for each kind of completion
+REPORT_TOKENS = 2500
+SECTION_TOKENS = 500
+FINDINGS_TOKENS = 800
+JSON_TOKENS = 150
+FILENAME_TOKENS = 8
+
+CHUNK_WORDS = 4
+SEARCH_TEXT_WORDS = 300
+SEARCH_PAGES_PER_TERM = 10
+SEARCH_PAGE_MAX_AGE_DAYS = 365
+
+
+@dataclass
+class LatencyModel:
+    """Latencies of the stub backends, in seconds unless noted otherwise.
+
+    Time to first token and search latency are log-normal around their medians,
+    which gives the long right tail seen from real APIs. On top of that a
+    `stall_probability` share of requests hang for `stall` seconds before
+    answering. Batches complete `batch` seconds after they are created.
+    `time_scale` multiplies every delay, so runs can be compressed
+    while keeping their shape.
+    """
+
+    llm_first_token: float = 0.8
+    llm_tokens_per_second: float = 60.0
+    search: float = 1.2
+    sigma: float = 0.5
+    stall_probability: float = 0.0
+    stall: float = 30.0
+    batch: float = 60.0
+    time_scale: float = 1.0
+
+    def sample(self, median: float) -> float:
+        latency = random.lognormvariate(math.log(median), self.sigma)
+        if random.random() < self.stall_probability:
+            latency += self.stall
+        return latency * self.time_scale
+
+    def generation(self, tokens: int) -> float:
+        return tokens / self.llm_tokens_per_second * self.time_scale
+
+
+def _text(tokens: int, cite: bool = False) -> str:
+    words = []
+    for i in range(max(1, int(tokens * 0.75))):
+        words.append(random.choice(_WORDS))
+        if cite and i % 40 == 39:
+            words[-1] += f" [S{random.randint(1, 10)}]."
+    return " ".join(words)
+
+
+def _markdown(tokens: int) -> str:
+    sections = max(1, tokens // 400)
+    return "\n\n".join(
+        f"## {random.choice(_WORDS).title()} {i + 1}\n\n{_text(tokens // sections, cite=True)}"
+        for i in range(sections)
+    )
+
+
+def _json_completion() -> str:
+    # One payload satisfies every structured output the agent asks for; the
+    # models ignore the fields they do not declare
+    run = uuid.uuid4().hex[:8]
+    return json.dumps(
+        {
+            "questions": [f"{_text(8)}?" for _ in range(3)],
+            "queries": [f"{_text(6)} {run}-{i}" for i in range(5)],
+            "thought_process": _text(60),
+            "knowledge_gaps": [_text(8) for _ in range(2)],
+            "needs_more_context": random.random() < 0.5,
+            "follow_up_queries": [f"{_text(6)} {run}-f{i}" for i in range(3)],
+            "subtopics": [
+                {"name": _text(3).title(), "brief": _text(40)} for _ in range(3)
+            ],
+            "title": _text(6).title(),
+            "sections": [
+                {
+                    "heading": _text(4).title(),
+                    "description": _text(20),
+                    "source_ids": [f"S{random.randint(1, 20)}" for _ in range(4)],
+                }
+                for _ in range(REPORT_TOKENS // SECTION_TOKENS)
+            ],
+        }
+    )
+
+
+def _completion(request: dict) -> tuple[str, int]:
+    system_prompt = request["messages"][0]["content"]
+    user_prompt = request["messages"][-1]["content"]
+
+    if request.get("response_format", {}).get("type") == "json_object":
+        return _json_completion(), JSON_TOKENS
+    if system_prompt == FILENAME_GENERATION_SYSTEM_PROMPT:
+        return "_".join(random.sample(_WORDS, 3)), FILENAME_TOKENS
+    if GENERATE_REPORT_SYSTEM_PROMPT in user_prompt:
+        return _markdown(REPORT_TOKENS), REPORT_TOKENS
+    if (
+        REPORT_SECTION_SYSTEM_PROMPT in user_prompt
+        or SECTION_UPDATE_SYSTEM_PROMPT in user_prompt
+    ):
+        return _text(SECTION_TOKENS, cite=True), SECTION_TOKENS
+    return _text(FINDINGS_TOKENS, cite=True), FINDINGS_TOKENS
+
+
+def _usage(request: dict, completion_tokens: int) -> dict:
+    prompt_tokens = sum(len(m["content"]) for m in request["messages"]) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+def _chat_completion(request: dict, content: str, usage: dict) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": usage,
+    }
+
+
+def _file_object(file_id: str, content: bytes, purpose: str) -> dict:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(content),
+        "created_at": int(time.time()),
+        "filename": f"{file_id}.jsonl",
+        "purpose": purpose,
+        "status": "processed",
+    }
+
+
+def _published_date(term: str, page: int) -> datetime:
+    # Fixed per page, spread over the last year
+    age = zlib.crc32(f"{term}-{page}".encode()) % SEARCH_PAGE_MAX_AGE_DAYS
+    return datetime.now(UTC) - timedelta(days=age)
+
+
+def _search_result(
+    query: str, rank: int, published_after: datetime | None = None
+) -> dict | None:
+    # Pages come from a small pool per query term, so queries sharing terms
+    # return the same pages, and lower ranks are less often on topic. Only the
+    # pages published since `published_after` are eligible.
+    terms = [word for word in query.split() if word in _WORDS] or ["misc"]
+    term = terms[rank % len(terms)]
+    pages = [
+        page
+        for page in range(SEARCH_PAGES_PER_TERM)
+        if published_after is None or _published_date(term, page) >= published_after
+    ]
+    if not pages:
+        return None
+    page = random.choice(pages)
+    if random.random() < max(0.2, 1 - rank / 10):
+        title = f"{query} {term} {page}"
+        text = _text(SEARCH_TEXT_WORDS)
+    else:
+        other_words = [word for word in _WORDS if word not in terms] or _WORDS
+        title = f"{' '.join(random.sample(other_words, 3))} {page}"
+        text = " ".join(random.choices(other_words, k=SEARCH_TEXT_WORDS))
+    return {
+        "id": f"{term}-{page}",
+        "url": f"https://example.com/{term}/{page}",
+        "title": title,
+        "text": f"{title}. {text}",
+        "publishedDate": _published_date(term, page).strftime("%Y-%m-%dT00:00:00.000Z"),
+        "author": None,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency: LatencyModel
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict) -> None:
+        self._send_bytes(json.dumps(payload).encode(), "application/json")
+
+    def _send_bytes(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OpenAIStubHandler(_Handler):
+    # Uploaded files and batches, shared by the handlers of one server
+    files: dict[str, bytes]
+    batches: dict[str, dict]
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if match := re.fullmatch(r".*/batches/([\w-]+)", path):
+            batch = self.batches.get(match[1])
+            if batch is None:
+                self.send_error(404)
+            else:
+                self._send_json(batch)
+        elif match := re.fullmatch(r".*/files/([\w-]+)/content", path):
+            content = self.files.get(match[1])
+            if content is None:
+                self.send_error(404)
+            else:
+                self._send_bytes(content, "application/octet-stream")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path.endswith("/files"):
+            self._upload_file()
+            return
+        if self.path.endswith("/batches"):
+            self._create_batch()
+            return
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        request = self._read_json()
+        content, completion_tokens = _completion(request)
+        usage = _usage(request, completion_tokens)
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+        }
+
+        time.sleep(self.latency.sample(self.latency.llm_first_token))
+
+        if not request.get("stream"):
+            time.sleep(self.latency.generation(completion_tokens))
+            self._send_json(_chat_completion(request, content, usage))
+            return
+
+        # Chunked rather than closing the connection, so clients can reuse it
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        pieces = re.findall(r"\S+\s*", content)
+        step = CHUNK_WORDS
+        delay = self.latency.generation(completion_tokens) * step / len(pieces)
+        for i in range(0, len(pieces), step):
+            self._send_event(
+                {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": "".join(pieces[i : i + step])},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+            )
+            time.sleep(delay)
+
+        self._send_event(
+            {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+        )
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def _upload_file(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        form = BytesParser(policy=email.policy.default).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+            + self.rfile.read(length)
+        )
+        content = next(
+            part.get_payload(decode=True)
+            for part in form.iter_parts()
+            if part.get_param("name", header="content-disposition") == "file"
+        )
+
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        self._send_json(_file_object(file_id, content, "batch"))
+
+    def _create_batch(self) -> None:
+        request = self._read_json()
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"],
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "metadata": request.get("metadata"),
+        }
+        threading.Thread(target=self._run_batch, args=(batch_id,), daemon=True).start()
+        self._send_json(self.batches[batch_id])
+
+    def _run_batch(self, batch_id: str) -> None:
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]].decode().splitlines()
+        time.sleep(self.latency.sample(self.latency.batch))
+
+        output = []
+        for line in filter(None, lines):
+            item = json.loads(line)
+            content, completion_tokens = _completion(item["body"])
+            body = _chat_completion(
+                item["body"], content, _usage(item["body"], completion_tokens)
+            )
+            output.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": item["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                )
+            )
+
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = "\n".join(output).encode()
+        batch.update(
+            status="completed",
+            output_file_id=file_id,
+            completed_at=int(time.time()),
+            request_counts={
+                "total": len(output),
+                "completed": len(output),
+                "failed": 0,
+            },
+        )
+
+    def _send_event(self, payload: dict) -> None:
+        self._send_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+    def _send_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class ExaStubHandler(_Handler):
+    def do_POST(self):
+        if self.path != "/search":
+            self.send_error(404)
+            return
+
+        request = self._read_json()
+        query = request.get("query", "")
+        num_results = request.get("numResults", 5)
+        published_after = None
+        if request.get("startPublishedDate"):
+            published_after = datetime.fromisoformat(
+                request["startPublishedDate"][:10]
+            ).replace(tzinfo=UTC)
+
+        time.sleep(self.latency.sample(self.latency.search))
+
+        results = [
+            _search_result(query, rank, published_after) for rank in range(num_results)
+        ]
+        self._send_json(
+            {
+                "results": [result for result in results if result is not None],
+                "resolvedSearchType": "neural",
+            }
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on responses they no longer need, e.g. hedged requests
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubBackends:
+    """Local HTTP servers that mimic the OpenAI chat completions and Exa search
+    APIs closely enough for the real clients to talk to them."""
+
+    def __init__(self, latency: LatencyModel, host: str = "127.0.0.1"):
+        self._servers = [
+            _Server(
+                (host, 0),
+                type(
+                    handler.__name__,
+                    (handler,),
+                    {"latency": latency, "files": {}, "batches": {}},
+                ),
+            )
+            for handler in (OpenAIStubHandler, ExaStubHandler)
+        ]
+
+    @property
+    def openai_url(self) -> str:
+        return f"http://{self._address(self._servers[0])}/v1"
+
+    @property
+    def exa_url(self) -> str:
+        return f"http://{self._address(self._servers[1])}"
+
+    def start(self) -> None:
+        for server in self._servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    @staticmethod
+    def _address(server: ThreadingHTTPServer) -> str:
+        host, port = server.server_address[:2]
+        return f"{host}:{port}"
+
+
+def serve(latency: LatencyModel, urls) -> None:
+    """Runs the stub servers until the process is terminated, sending their
+    URLs back through `urls` (a multiprocessing queue)."""
+    backends = StubBackends(latency)
+    backends.start()
+    urls.put((backends.openai_url, backends.exa_url))
+    threading.Event().wait()
@@ -0,0 +1,101 @@
+"""MCP server with a stub search tool, for exercising the MCP client under load.
+
+Speaks MCP over stdio, so the client starts it as a subprocess:
+
+    python -m tools.stub_mcp --search-latency 1.2 --time-scale 0.1
+
+The `search` tool sleeps for a search latency drawn from the same model as the
+stub Exa server and returns a JSON list of documents from the same page pool.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from mcp.server.fastmcp import FastMCP
+
+from .stub_backends import LatencyModel, _search_result
+
+RESULTS_PER_CALL = 3
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_server(latency: LatencyModel) -> FastMCP:
+    server = FastMCP("stub-search", log_level="WARNING")
+
+    @server.tool()
+    async def search(query: str, num_results: int = RESULTS_PER_CALL) -> str:
+        """Searches the stub corpus and returns a JSON list of documents."""
+        await asyncio.sleep(latency.sample(latency.search))
+        results = [_search_result(query, rank) for rank in range(num_results)]
+        return json.dumps(
+            [
+                {
+                    "title": result["title"],
+                    "url": result["url"],
+                    "text": result["text"],
+                    "published_date": result["publishedDate"],
+                }
+                for result in results
+                if result is not None
+            ]
+        )
+
+    return server
+
+
+def server_config(latency: LatencyModel, timeout: float = 10.0) -> dict:
+    """Entry for `MCP_SERVERS_CONFIG` that starts this server with `latency`."""
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [
+            "-m",
+            "tools.stub_mcp",
+            "--search-latency",
+            str(latency.search),
+            "--sigma",
+            str(latency.sigma),
+            "--stall-probability",
+            str(latency.stall_probability),
+            "--stall",
+            str(latency.stall),
+            "--time-scale",
+            str(latency.time_scale),
+        ],
+        "cwd": _ROOT,
+        "tool": "search",
+        "query_argument": "query",
+        "timeout": timeout,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stub MCP search server (stdio).")
+    parser.add_argument("--search-latency", type=float, default=LatencyModel.search)
+    parser.add_argument("--sigma", type=float, default=LatencyModel.sigma)
+    parser.add_argument(
+        "--stall-probability", type=float, default=LatencyModel.stall_probability
+    )
+    parser.add_argument("--stall", type=float, default=LatencyModel.stall)
+    parser.add_argument("--time-scale", type=float, default=LatencyModel.time_scale)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    latency = LatencyModel(
+        search=args.search_latency,
+        sigma=args.sigma,
+        stall_probability=args.stall_probability,
+        stall=args.stall,
+        time_scale=args.time_scale,
+    )
+    create_server(latency).run("stdio")
+
+
+if __name__ == "__main__":
+    main()